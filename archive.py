@@ -0,0 +1,111 @@
+"""
+収集した記事のローカルアーカイブ（Parquet、月ごとのパーティション）
+
+実行ごとの DataFrame を全列（published・fetched_at・summary なども含む）そのまま
+archive/YYYYMM/ に追記する。YYYYMM は Google Sheets のシート名と同じキー。
+実行ごとの小さなファイルは、数がたまるか月が変わったら1つのファイルにまとめる（コンパクション）。
+"""
+
+import glob
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_DIRECTORY = 'archive'
+# 当月のパーティションで実行ファイルがこの数に達したらまとめる
+DEFAULT_COMPACT_THRESHOLD = 24
+COMPRESSION = 'zstd'
+RUN_PREFIX = 'run-'
+PART_PREFIX = 'part-'
+
+
+def _read_tables(paths: List[str]) -> pa.Table:
+    # 実行ごとに列が増減しても読めるよう、スキーマを揃えて結合する
+    return pa.concat_tables([pq.read_table(path) for path in paths], promote_options='default')
+
+
+def _write_atomic(table: pa.Table, path: str) -> None:
+    tmp_path = path + '.tmp'
+    pq.write_table(table, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+
+
+class ArticleArchive:
+    def __init__(self, settings: Dict = None):
+        """
+        月ごとにパーティションを分けた Parquet アーカイブ
+
+        Args:
+            settings (Dict): config.json の archive セクション
+                directory: 保存先
+                compact_threshold: 当月の実行ファイルをまとめる数
+        """
+        settings = settings or {}
+        self.directory = settings.get('directory', DEFAULT_DIRECTORY)
+        self.compact_threshold = int(settings.get('compact_threshold', DEFAULT_COMPACT_THRESHOLD))
+
+    def partition_path(self, month: str) -> str:
+        return os.path.join(self.directory, month)
+
+    def append(self, df: pd.DataFrame, month: Optional[str] = None) -> str:
+        """
+        DataFrame を当月（month）のパーティションに追記し、書き込んだファイルのパスを返す
+
+        書き込み後、たまった実行ファイルと過去の月のパーティションをまとめる。
+        """
+        # シート名と同じ YYYYMM（sheets を import すると Google の認証ライブラリまで読み込まれるため使わない）
+        month = month or datetime.now().strftime('%Y%m')
+        partition = self.partition_path(month)
+        os.makedirs(partition, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # メタデータに実行統計（DataFrame.attrs）を持ち込まない
+        table = table.replace_schema_metadata(None)
+        path = os.path.join(partition, f'{RUN_PREFIX}{time.strftime("%Y%m%d%H%M%S")}-{uuid.uuid4().hex[:8]}.parquet')
+        _write_atomic(table, path)
+
+        if len(self._files(partition, RUN_PREFIX)) >= self.compact_threshold:
+            self.compact(month)
+        for other in self.months():
+            if other < month and len(self._files(self.partition_path(other))) > 1:
+                self.compact(other)
+        return path
+
+    @staticmethod
+    def _files(partition: str, prefix: str = '') -> List[str]:
+        return sorted(glob.glob(os.path.join(partition, f'{prefix}*.parquet')))
+
+    def months(self) -> List[str]:
+        """アーカイブにある月（YYYYMM）の一覧"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if len(name) == 6 and name.isdigit() and os.path.isdir(self.partition_path(name)))
+
+    def compact(self, month: str) -> Optional[str]:
+        """月のパーティションの全ファイルを1つの part ファイルにまとめ、そのパスを返す"""
+        partition = self.partition_path(month)
+        files = self._files(partition)
+        if len(files) <= 1:
+            return files[0] if files else None
+        path = os.path.join(partition, f'{PART_PREFIX}{time.strftime("%Y%m%d%H%M%S")}-{uuid.uuid4().hex[:8]}.parquet')
+        _write_atomic(_read_tables(files), path)
+        for old in files:
+            os.remove(old)
+        print(f"アーカイブ {month}: {len(files)}ファイルを {os.path.basename(path)} にまとめました")
+        return path
+
+    def read(self, months: Optional[List[str]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """指定した月（省略時は全期間）の記事を DataFrame で読み込む"""
+        paths = [path for month in (months or self.months()) for path in self._files(self.partition_path(month))]
+        if not paths:
+            return pd.DataFrame(columns=columns)
+        table = _read_tables(paths)
+        if columns:
+            table = table.select([name for name in columns if name in table.column_names])
+        return table.to_pandas()
@@ -0,0 +1,317 @@
+"""
+新着記事の本文の取得・抽出と、圧縮した本文のキャッシュ（SQLite）
+
+見出しだけでなく本文を要約に渡すため、新着記事のリンク先を取得して本文を取り出す。
+取得は fetcher.get を通るので、ドメインごとの同時接続数・レート制御と全体の同時実行数の制限が
+そのまま効く。実行全体が長引かないよう、本文の取得には時間の予算を設け、予算内に終わらなかった
+記事は見出しのまま要約する（取得中だったものは終わり次第キャッシュに入り、次回使われる）。
+
+本文は zlib で圧縮し、本文のハッシュをキーに保存する（同じ本文は1つだけ）。URL（正規化した
+リンクのハッシュ）から本文のハッシュへの対応も保存し、同じ URL は二度取得しない。
+本文を取り出せなかったページ（PDF など）も記録し、取得し直さない。
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as WaitTimeout, as_completed
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import fetcher
+import link_extractor
+import politeness
+import run_stats
+import url_canon
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # lxml は任意
+    lxml = None
+
+DEFAULT_PATH = 'article_bodies.db'
+# この日数より前に取得した本文は削除する
+DEFAULT_MAX_AGE_DAYS = 30
+# 本文の取得にかける時間（秒）の上限
+DEFAULT_BUDGET_SECONDS = 20.0
+DEFAULT_MAX_WORKERS = 8
+# 要約に渡す本文の最大文字数
+DEFAULT_MAX_CHARS = 4000
+# これより短い段落は本文とみなさない（メニューやキャプションなど）
+MIN_PARAGRAPH_CHARS = 20
+COMPRESSION_LEVEL = 6
+# 1回の IN 句に渡すハッシュ数（SQLite の変数上限 999 未満）
+LOOKUP_CHUNK = 900
+
+# 中のテキストを本文として扱わない要素
+_SKIP_TAGS = ('script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'button')
+_DESCRIPTION_KEYS = ('description', 'og:description')
+
+
+def _clean(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _best_group(groups: Dict[object, List[str]]) -> List[str]:
+    # 同じ親要素の下の段落を1グループとし、テキストが最も多いものを本文とする
+    return max(groups.values(), key=lambda paragraphs: sum(map(len, paragraphs))) if groups else []
+
+
+class _ParagraphParser(HTMLParser):
+    """<p> のテキストを親要素ごとに集める html.parser のハンドラ"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.groups: Dict[int, List[str]] = {}
+        self.description = ''
+        self._stack: List[Tuple[str, int]] = []  # (タグ, 要素の番号)
+        self._next_id = 0
+        self._skip_depth = 0
+        self._paragraph: Optional[List[str]] = None
+        self._parent = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs_map = dict(attrs)
+            if (attrs_map.get('name') or attrs_map.get('property')) in _DESCRIPTION_KEYS and not self.description:
+                self.description = _clean(attrs_map.get('content') or '')
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        if tag == 'p':
+            self._close_paragraph()
+            self._paragraph = []
+            self._parent = self._stack[-1][1] if self._stack else None
+        self._next_id += 1
+        self._stack.append((tag, self._next_id))
+
+    def handle_endtag(self, tag):
+        if tag == 'p':
+            self._close_paragraph()
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        # 閉じ忘れのある要素は、対応する開始タグまでまとめて閉じる
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                del self._stack[depth:]
+                break
+
+    def handle_data(self, data):
+        if self._paragraph is not None and not self._skip_depth:
+            self._paragraph.append(data)
+
+    def _close_paragraph(self):
+        if self._paragraph is None:
+            return
+        text = _clean(''.join(self._paragraph))
+        if len(text) >= MIN_PARAGRAPH_CHARS:
+            self.groups.setdefault(self._parent, []).append(text)
+        self._paragraph = None
+
+    def close(self):
+        super().close()
+        self._close_paragraph()
+
+
+def _extract_html_parser(content: bytes, charset: str) -> str:
+    parser = _ParagraphParser()
+    parser.feed(content.decode(charset, errors='replace'))
+    parser.close()
+    return '\n'.join(_best_group(parser.groups)) or parser.description
+
+
+def _extract_lxml(content: bytes, charset: str) -> str:
+    root = lxml.html.document_fromstring(content, parser=link_extractor.lxml_parser(charset))
+    description = ''
+    for meta in root.iter('meta'):
+        if (meta.get('name') or meta.get('property')) in _DESCRIPTION_KEYS:
+            description = _clean(meta.get('content') or '')
+            break
+    for element in list(root.iter(*_SKIP_TAGS)):
+        element.drop_tree()
+    groups: Dict[object, List[str]] = {}
+    for paragraph in root.iter('p'):
+        text = _clean(paragraph.text_content())
+        if len(text) >= MIN_PARAGRAPH_CHARS:
+            groups.setdefault(paragraph.getparent(), []).append(text)
+    return '\n'.join(_best_group(groups)) or description
+
+
+def extract_text(content: bytes, content_type: Optional[str] = None) -> str:
+    """
+    記事ページから本文を取り出す（見つからなければ meta description、それもなければ空文字列）
+
+    同じ親要素の下にある <p> を1グループとし、テキストの合計が最も多いグループを本文とする。
+    ナビゲーション・ヘッダー・フッター・スクリプトなどの中は除く。
+    """
+    charset = link_extractor.detect_charset(content, content_type)
+    if lxml is not None:
+        try:
+            return _extract_lxml(content, charset)
+        except (lxml.etree.ParserError, LookupError, ValueError):
+            pass
+    return _extract_html_parser(content, charset)
+
+
+class BodyStore:
+    def __init__(self, path: str = DEFAULT_PATH, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        """
+        本文のキャッシュ
+
+        Args:
+            path (str): SQLite ファイルのパス
+            max_age_days (float): この日数より前に取得した本文を削除する
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url_hash INTEGER PRIMARY KEY,
+                content_hash INTEGER,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bodies (
+                content_hash INTEGER PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+        ''')
+        self._conn.commit()
+
+    def get_many(self, url_hashes: Iterable[int]) -> Dict[int, str]:
+        """取得済みの URL の本文を {URL のハッシュ: 本文} で返す（本文がなかったものは空文字列）"""
+        url_hashes = list(set(url_hashes))
+        found = {}
+        with self._lock:
+            for start in range(0, len(url_hashes), LOOKUP_CHUNK):
+                chunk = url_hashes[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    'SELECT u.url_hash, b.data FROM urls u LEFT JOIN bodies b ON b.content_hash = u.content_hash'
+                    f' WHERE u.url_hash IN ({placeholders})', chunk)
+                for url_hash, data in rows:
+                    found[url_hash] = zlib.decompress(data).decode('utf-8') if data is not None else ''
+        return found
+
+    def put(self, url_hash: int, body: str, now: Optional[float] = None) -> None:
+        """URL の本文を保存する（空文字列なら「本文なし」として URL だけ記録する）"""
+        now = time.time() if now is None else now
+        content_hash = url_canon.hash_text(body) if body else None
+        with self._lock, self._conn:
+            if content_hash is not None:
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO bodies (content_hash, data) VALUES (?, ?)',
+                    (content_hash, zlib.compress(body.encode('utf-8'), COMPRESSION_LEVEL)))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO urls (url_hash, content_hash, fetched_at) VALUES (?, ?, ?)',
+                (url_hash, content_hash, now))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """max_age_days より前に取得した URL と、どの URL からも参照されない本文を削除し、削除した URL 数を返す"""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            removed = self._conn.execute('DELETE FROM urls WHERE fetched_at < ?',
+                                         (now - self.max_age_days * 86400,)).rowcount
+            if removed:
+                self._conn.execute('DELETE FROM bodies WHERE content_hash NOT IN'
+                                   ' (SELECT content_hash FROM urls WHERE content_hash IS NOT NULL)')
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _fetch_one(store: BodyStore, url_hash: int, link: str, max_chars: int) -> Optional[str]:
+    """記事ページを取得して本文を保存し、本文を返す（取得エラーなら保存せず None）"""
+    stats = run_stats.current
+    try:
+        response = fetcher.get(link, track_health=False)
+        response.raise_for_status()
+    except Exception:
+        stats.incr('本文取得', '取得エラー')
+        return None
+    content_type = response.headers.get('Content-Type', '')
+    body = ''
+    if 'html' in content_type.lower() or not content_type:
+        try:
+            body = extract_text(response.content, content_type)[:max_chars]
+        except Exception:
+            body = ''
+    stats.incr('本文取得', '受信バイト数', len(response.content))
+    stats.incr('本文取得', '取得' if body else '本文なし')
+    store.put(url_hash, body)
+    return body
+
+
+_store: Optional[BodyStore] = None
+
+
+def get_store(settings: Dict = None) -> BodyStore:
+    """config.json の article_body 設定に対応するキャッシュを返す（同じパスなら使い回す）"""
+    global _store
+    settings = settings or {}
+    path = settings.get('path', DEFAULT_PATH)
+    if _store is None or _store.path != path:
+        if _store is not None:
+            _store.close()
+        _store = BodyStore(path, float(settings.get('max_age_days', DEFAULT_MAX_AGE_DAYS)))
+    return _store
+
+
+def fetch_bodies(items: List, settings: Dict = None) -> Dict[int, str]:
+    """
+    記事の本文を {url_hash: 本文} で返す（キャッシュにあるものは取得しない）
+
+    時間の予算（budget_seconds）を過ぎたら待つのをやめ、それまでに得られた本文だけを返す。
+
+    Args:
+        items (List): 記事のリスト
+        settings (Dict): config.json の article_body セクション
+            path / max_age_days: 本文キャッシュ
+            budget_seconds: 取得にかける時間の上限
+            max_workers: 同時に取得する記事数（ドメインごとの制限は politeness の設定）
+            max_chars: 要約に渡す本文の最大文字数
+    """
+    settings = settings or {}
+    budget = float(settings.get('budget_seconds', DEFAULT_BUDGET_SECONDS))
+    max_workers = max(1, int(settings.get('max_workers', DEFAULT_MAX_WORKERS)))
+    max_chars = int(settings.get('max_chars', DEFAULT_MAX_CHARS))
+    stats = run_stats.current
+    started = time.perf_counter()
+    store = get_store(settings)
+
+    links = {url_canon.item_hash(item): item['link'] for item in items
+             if (item.get('link') or '').startswith(('http://', 'https://'))}
+    cached = store.get_many(links)
+    bodies = {url_hash: body[:max_chars] for url_hash, body in cached.items() if body}
+    stats.incr('本文取得', 'キャッシュ', len(cached))
+
+    todo = [(url_hash, link) for url_hash, link in links.items() if url_hash not in cached]
+    if todo:
+        # 同じホストの記事が固まらないよう、ホスト単位でラウンドロビンに並べる
+        todo = politeness.interleave_by_host(todo, key=lambda pair: urlparse(pair[1]).netloc)
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(todo)))
+        futures = {executor.submit(_fetch_one, store, url_hash, link, max_chars): url_hash
+                   for url_hash, link in todo}
+        try:
+            for future in as_completed(futures, timeout=budget):
+                body = future.result()
+                if body:
+                    bodies[futures[future]] = body
+        except WaitTimeout:
+            unfinished = sum(1 for future in futures if not future.done())
+            stats.incr('本文取得', '時間切れ', unfinished)
+            print(f"本文取得: 予算 {budget:.0f}秒を過ぎたため {unfinished}件は見出しで要約します")
+        finally:
+            # 未着手の取得は取り消し、取得中のものは待たない（終わり次第キャッシュに保存される）
+            executor.shutdown(wait=False, cancel_futures=True)
+    store.prune()
+    stats.record_time('ステージ', '本文取得', time.perf_counter() - started)
+    return bodies
@@ -0,0 +1,99 @@
+"""
+記事レコード（__slots__ のクラス）と、記事のリストから列ごとに DataFrame を組み立てる処理
+
+記事ごとに辞書を作ると、同じキー文字列を持つハッシュテーブルが記事の数だけでき、
+大量のバックフィルではメモリの大半を占める。Article は属性を固定した小さなオブジェクトで、
+既存の処理がそのまま使えるよう辞書と同じ item['title'] / item.get('link') の形でも読み書きできる。
+fetched_at はページの取得ごとに一度だけ作り、同じページの記事で同じ文字列を共有する。
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import pandas as pd
+
+# 必ず DataFrame に含める列（この順）
+BASE_COLUMNS = ('source', 'title', 'link', 'published', 'fetched_at', 'summary')
+# 途中の処理で値が入った場合だけ含める列
+#   url_hash: url_canon.item_hash、sources: url_canon.dedup / near_dup.collapse、member_hashes: near_dup.collapse
+OPTIONAL_COLUMNS = ('url_hash', 'sources', 'member_hashes')
+
+
+class Article:
+    __slots__ = BASE_COLUMNS + OPTIONAL_COLUMNS
+
+    def __init__(self, source: str, title: str, link: str, published: str, fetched_at: str,
+                 summary: str = ''):
+        self.source = source
+        self.title = title
+        self.link = link
+        self.published = published
+        self.fetched_at = fetched_at
+        self.summary = summary
+        self.url_hash = None
+        self.sources = None
+        self.member_hashes = None
+
+    @classmethod
+    def from_dict(cls, item: Dict, **overrides) -> 'Article':
+        """辞書（HTTP キャッシュに保存した記事など）から作る。知らないキーは無視する"""
+        values = {**item, **overrides}
+        article = cls(values.get('source', ''), values.get('title', ''), values.get('link', ''),
+                      values.get('published', ''), values.get('fetched_at', ''), values.get('summary', ''))
+        for name in OPTIONAL_COLUMNS:
+            if values.get(name) is not None:
+                setattr(article, name, values[name])
+        return article
+
+    # 辞書と同じ形で扱えるようにする（値が None の任意列は「キーがない」とみなす）
+    def __getitem__(self, key: str):
+        try:
+            value = getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value) -> None:
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def keys(self) -> List[str]:
+        return [name for name in self.__slots__ if getattr(self, name) is not None]
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __repr__(self) -> str:
+        return f'Article({self.to_dict()!r})'
+
+
+def from_rows(source: str, rows: Iterable[Tuple[str, str, str]], fetched_at: str) -> List[Article]:
+    """解析結果の (title, link, published) を記事にする（fetched_at は全件で共有する）"""
+    return [Article(source, title, link, published, fetched_at) for title, link, published in rows]
+
+
+def to_frame(items: Sequence) -> pd.DataFrame:
+    """
+    記事のリストを列ごとに集めて DataFrame にする
+
+    記事ごとの辞書を経由しないため、pd.DataFrame(記事の辞書のリスト) より一時オブジェクトが少ない。
+    Article 以外（辞書）が混ざっていても扱える。
+    """
+    if not len(items):
+        return pd.DataFrame()
+    columns = {name: [item.get(name, '') for item in items] for name in BASE_COLUMNS}
+    for name in OPTIONAL_COLUMNS:
+        values = [item.get(name) for item in items]
+        if any(value is not None for value in values):
+            columns[name] = values
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+記事レコード（articles.Article と列ごとの DataFrame 作成）と従来の辞書方式のメモリ使用量を比べるベンチマーク
+
+大量のバックフィルを想定し、解析結果の (title, link, published) から DataFrame を作るまでを
+tracemalloc で計測する。
+    従来: 記事ごとに辞書を作り、fetched_at を記事ごとに作成し、pd.DataFrame(辞書のリスト)
+    新方式: Article（__slots__）を作り、fetched_at はページごとに1回、articles.to_frame()
+
+使い方:
+    python bench_articles.py --items 200000 --page-size 50
+"""
+
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+
+import pandas as pd
+
+import articles
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def make_pages(count: int, page_size: int):
+    """解析結果の行をページ単位で作る（実際のフィードに近い長さのタイトルとリンク）"""
+    pages = []
+    for start in range(0, count, page_size):
+        pages.append([(f'Markets wrap: stocks move as investors weigh outlook #{i}',
+                       f'https://www.example.com/news/2025/09/{i:08d}/markets-wrap?utm_source=rss',
+                       'Mon, 01 Sep 2025 09:30:00 GMT')
+                      for i in range(start, min(count, start + page_size))])
+    return pages
+
+
+def build_dicts(pages, source: str):
+    items = []
+    for rows in pages:
+        items.extend({
+            'source': source,
+            'title': title,
+            'link': link,
+            'published': published,
+            'fetched_at': _now(),
+            'summary': '',
+        } for title, link, published in rows)
+    return items
+
+
+def build_articles(pages, source: str):
+    items = []
+    for rows in pages:
+        items.extend(articles.from_rows(source, rows, _now()))
+    return items
+
+
+def measure(build, to_frame, pages):
+    """記事の作成と DataFrame 作成の (保持メモリ, 保持ブロック数, ピークメモリ, 所要時間)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = build(pages, 'Reuters')
+    snapshot = tracemalloc.take_snapshot()
+    stats = snapshot.statistics('filename')
+    retained = sum(stat.size for stat in stats)
+    blocks = sum(stat.count for stat in stats)
+    df = to_frame(items)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(df) == len(items)
+    return retained, blocks, peak, elapsed, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description='記事レコードのメモリ使用量のベンチマーク')
+    parser.add_argument('--items', type=int, default=200_000, help='記事数')
+    parser.add_argument('--page-size', type=int, default=50, help='1ページの記事数（fetched_at を作る単位）')
+    args = parser.parse_args()
+
+    pages = make_pages(args.items, args.page_size)
+    print(f"記事数: {args.items} / 1ページ {args.page_size}件\n")
+
+    baseline = measure(build_dicts, pd.DataFrame, pages)
+    compact = measure(build_articles, articles.to_frame, pages)
+    assert list(baseline[4].columns) == list(compact[4].columns)
+    assert baseline[4].drop(columns='fetched_at').equals(compact[4].drop(columns='fetched_at'))
+
+    print(f"{'':<28}{'辞書':>12}{'Article':>12}{'比':>8}")
+    rows = (
+        ('記事リストの保持メモリ (MB)', baseline[0] / 2 ** 20, compact[0] / 2 ** 20),
+        ('記事リストの保持ブロック数 (千)', baseline[1] / 1000, compact[1] / 1000),
+        ('DataFrame作成までのピーク (MB)', baseline[2] / 2 ** 20, compact[2] / 2 ** 20),
+        ('所要時間 (秒)', baseline[3], compact[3]),
+    )
+    for label, before, after in rows:
+        print(f"{label:<28}{before:>12.2f}{after:>12.2f}{before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+要約バックエンド（pytorch / quantized / onnx）の比較ベンチマークと品質チェック
+
+固定した見出しのセットを、バックエンドごとに新しいプロセスで要約し、読み込み時間・
+1件ずつの遅延（中央値）・バッチ推論のスループット・最大メモリ使用量（RSS）と、
+pytorch の出力との一致（完全一致の件数と単語の重なりの F1）を表示する。
+
+使い方:
+    # アーカイブから要約対象の見出しを bench_data/headlines.json に保存（初回のみ）
+    python bench_backends.py --record
+    python bench_backends.py --backends pytorch quantized onnx
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import summarizer
+from archive import ArticleArchive
+
+HEADLINES_PATH = os.path.join('bench_data', 'headlines.json')
+RECORD_LIMIT = 64
+
+CHILD = '''
+import json, resource, sys, time
+import summarizer
+settings, texts = json.loads(sys.stdin.read())
+provider = summarizer.Summarizer(settings)
+started = time.perf_counter()
+if provider.load() is None or provider.backend != settings['backend']:
+    print(json.dumps({"error": "読み込みに失敗しました"}))
+    sys.exit()
+load = time.perf_counter() - started
+provider.batch_size = 1
+latencies = []
+for text in texts[:16]:
+    started = time.perf_counter()
+    provider.summarize_many([text])
+    latencies.append(time.perf_counter() - started)
+provider.batch_size = settings.get('batch_size', summarizer.DEFAULT_BATCH_SIZE)
+started = time.perf_counter()
+summaries = provider.summarize_many(texts)
+elapsed = time.perf_counter() - started
+print(json.dumps({"load": load, "latency": sorted(latencies)[len(latencies) // 2],
+                  "throughput": len(texts) / elapsed, "summaries": summaries,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+'''
+
+
+def record(settings: dict) -> None:
+    """アーカイブの要約対象の見出しを保存する（以後の比較で同じセットを使う）"""
+    provider = summarizer.Summarizer(dict(settings, cache={'enabled': False}))
+    archive = ArticleArchive()
+    texts = []
+    for month in reversed(archive.months()):
+        titles = archive.read([month], columns=['title']).get('title', [])
+        texts.extend(title for title in titles if provider.needs_summary(title) and title not in texts)
+        if len(texts) >= RECORD_LIMIT:
+            break
+    if not texts:
+        print('アーカイブに要約対象の見出しがありません')
+        return
+    os.makedirs(os.path.dirname(HEADLINES_PATH), exist_ok=True)
+    with open(HEADLINES_PATH, 'w', encoding='utf-8') as f:
+        json.dump(texts[:RECORD_LIMIT], f, ensure_ascii=False, indent=2)
+    print(f"{len(texts[:RECORD_LIMIT])}件を {HEADLINES_PATH} に保存しました")
+
+
+def run(backend: str, settings: dict, texts: list) -> dict:
+    # 推論そのものを比べるため、要約キャッシュは使わない
+    child_settings = dict(settings, enabled=True, backend=backend, cache={'enabled': False},
+                          routing={'enabled': False}, min_text_length=0)
+    output = subprocess.run([sys.executable, '-c', CHILD], input=json.dumps([child_settings, texts]),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def word_f1(reference: str, candidate: str) -> float:
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    common = sum(min(ref.count(word), cand.count(word)) for word in set(cand))
+    if not common:
+        return 0.0
+    precision, recall = common / len(cand), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='要約バックエンドの比較')
+    parser.add_argument('--record', action='store_true', help='アーカイブの見出しを保存する')
+    parser.add_argument('--backends', nargs='+', default=list(summarizer.BACKENDS))
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('summarizer', {})
+    except FileNotFoundError:
+        settings = {}
+
+    if args.record:
+        record(settings)
+        return
+    if not os.path.exists(HEADLINES_PATH):
+        print(f"{HEADLINES_PATH} がありません。先に --record を実行してください")
+        return
+    with open(HEADLINES_PATH, 'r', encoding='utf-8') as f:
+        texts = json.load(f)
+    print(f"見出し: {len(texts)}件 / モデル: {settings.get('model', summarizer.DEFAULT_MODEL)}\n")
+
+    results = {}
+    for backend in [summarizer.DEFAULT_BACKEND] + [b for b in args.backends if b != summarizer.DEFAULT_BACKEND]:
+        results[backend] = run(backend, settings, texts)
+
+    reference = results[summarizer.DEFAULT_BACKEND].get('summaries')
+    print(f"{'バックエンド':<12}{'読み込み':>10}{'遅延(中央値)':>14}{'件/秒':>10}{'最大RSS':>10}{'完全一致':>10}{'単語F1':>8}")
+    for backend, result in results.items():
+        if 'error' in result:
+            print(f"{backend:<12}{result['error']}")
+            continue
+        summaries = result['summaries']
+        exact = sum(a == b for a, b in zip(reference, summaries)) if reference else 0
+        f1 = statistics.mean(word_f1(a, b) for a, b in zip(reference, summaries)) if reference else 0.0
+        print(f"{backend:<12}{result['load']:>9.1f}s{result['latency'] * 1000:>12.0f}ms"
+              f"{result['throughput']:>10.1f}{result['rss_mb']:>8.0f}MB{exact:>6}/{len(texts)}{f1:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+逐次フィードパーサー（feed_parser）と feedparser の解析速度を比較するベンチマーク
+
+使い方:
+    # config.json の rss_feeds を bench_data/feeds/ に保存（初回のみ）
+    python bench_feed_parser.py --record
+    # 保存したフィードで比較
+    python bench_feed_parser.py --repeat 5
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+import feedparser
+
+import feed_parser
+import fetcher
+
+FEEDS_DIR = os.path.join('bench_data', 'feeds')
+
+
+def record(config_path: str):
+    """設定されたフィードを取得してファイルに保存"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    fetcher.configure(config.get('fetch'), {'enabled': False}, config.get('politeness'), {'enabled': False})
+    os.makedirs(FEEDS_DIR, exist_ok=True)
+
+    def save(feed):
+        try:
+            response = fetcher.get(feed['url'])
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  {feed['name']}: 取得エラー {e}")
+            return
+        name = hashlib.sha1(feed['url'].encode()).hexdigest()[:16]
+        with open(os.path.join(FEEDS_DIR, f'{name}.xml'), 'wb') as f:
+            f.write(response.content)
+        print(f"  {feed['name']}: {len(response.content)} bytes")
+
+    fetcher.map_ordered(save, config['rss_feeds'])
+
+
+def bench(func, documents, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for content in documents:
+            func(content)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='フィード解析のベンチマーク')
+    parser.add_argument('--record', action='store_true', help='config.json のフィードを保存する')
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.config)
+        return
+
+    documents = []
+    for path in sorted(glob.glob(os.path.join(FEEDS_DIR, '*.xml'))):
+        with open(path, 'rb') as f:
+            documents.append(f.read())
+    if not documents:
+        print(f"{FEEDS_DIR} にフィードがありません。先に --record を実行してください")
+        return
+    total_bytes = sum(len(content) for content in documents)
+    print(f"フィード数: {len(documents)} / 合計 {total_bytes / 1024:.0f} KB / 繰り返し {args.repeat}回\n")
+
+    # 出力の一致率（タイトルとリンク）
+    matched = 0
+    compared = 0
+    for content in documents:
+        expected = [(e.get('title', ''), e.get('link', '')) for e in feedparser.parse(content).entries]
+        actual = [(e['title'], e['link']) for e in feed_parser.parse_entries(content)]
+        compared += max(len(expected), len(actual))
+        matched += sum(1 for a, b in zip(expected, actual) if a == b)
+    print(f"feedparser との一致率: {matched}/{compared} 件\n")
+
+    print(f"{'条件':<24}{'feedparser':>12}{'feed_parser':>14}{'高速化':>8}")
+    for label, limit in (('全件', None), ('先頭10件', 10), ('先頭5件', 5)):
+        baseline = bench(lambda c: feedparser.parse(c).entries[:limit], documents, args.repeat)
+        fast = bench(lambda c: feed_parser.parse_entries(c, limit=limit), documents, args.repeat)
+        print(f"{label:<24}{baseline:>11.3f}s{fast:>13.3f}s{baseline / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
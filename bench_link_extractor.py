@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+リンク抽出（link_extractor）と従来の BeautifulSoup による抽出の速度を比較するベンチマーク
+
+使い方:
+    # html タイプのソース（金融庁・NHK・Investing.com・日経新聞）のページを bench_data/html/ に保存（初回のみ）
+    python bench_link_extractor.py --record
+    # 保存したページで比較
+    python bench_link_extractor.py --repeat 5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+import fetcher
+import link_extractor
+import sources
+
+PAGES_DIR = os.path.join('bench_data', 'html')
+INDEX_PATH = os.path.join(PAGES_DIR, 'index.json')
+
+
+def record(config_path: str):
+    """html タイプのソースのページを取得してファイルに保存"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    fetcher.configure(config.get('fetch'), {'enabled': False}, config.get('politeness'), {'enabled': False})
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    pages = [(spec, url) for spec in sources.load_sources(config) if spec['type'] == 'html' for url in spec['urls']]
+
+    def save(page):
+        spec, url = page
+        try:
+            response = fetcher.get(url, headers=spec.get('headers'))
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  {url}: 取得エラー {e}")
+            return None
+        name = hashlib.sha1(url.encode()).hexdigest()[:16] + '.html'
+        with open(os.path.join(PAGES_DIR, name), 'wb') as f:
+            f.write(response.content)
+        print(f"  {url}: {len(response.content)} bytes")
+        return {'file': name, 'url': url, 'name': spec['name'],
+                'content_type': response.headers.get('Content-Type', '')}
+
+    index = [entry for entry in fetcher.map_ordered(save, pages) if entry]
+    with open(INDEX_PATH, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+
+def extract_bs4(content: bytes, content_type: str = None):
+    """従来の実装（ページ全体を BeautifulSoup で解析して <a href> を列挙）"""
+    soup = BeautifulSoup(content, 'html.parser')
+    return [(link.get('href'), link.get_text(strip=True))
+            for link in soup.find_all('a', href=True) if link.get('href')]
+
+
+def bench(func, pages, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for content, content_type in pages:
+            func(content, content_type)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML リンク抽出のベンチマーク')
+    parser.add_argument('--record', action='store_true', help='html タイプのソースのページを保存する')
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.config)
+        return
+
+    if not os.path.exists(INDEX_PATH):
+        print(f"{PAGES_DIR} にページがありません。先に --record を実行してください")
+        return
+    with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    pages = []
+    for entry in index:
+        with open(os.path.join(PAGES_DIR, entry['file']), 'rb') as f:
+            pages.append((f.read(), entry.get('content_type')))
+    total_bytes = sum(len(content) for content, _ in pages)
+    print(f"ページ数: {len(pages)} / 合計 {total_bytes / 1024:.0f} KB / 繰り返し {args.repeat}回\n")
+
+    candidates = [('html.parser', lambda c, t: link_extractor.extract_links(c, t, backend='html.parser'))]
+    if link_extractor.lxml is not None:
+        candidates.append(('lxml', lambda c, t: link_extractor.extract_links(c, t, backend='lxml')))
+    else:
+        print('lxml がインストールされていないため html.parser のみ計測します\n')
+
+    # 出力の一致率（href とリンクテキスト）
+    for label, func in candidates:
+        matched = 0
+        compared = 0
+        for content, content_type in pages:
+            expected = extract_bs4(content, content_type)
+            actual = func(content, content_type)
+            compared += max(len(expected), len(actual))
+            matched += sum(1 for a, b in zip(expected, actual) if a == b)
+        print(f"BeautifulSoup との一致率（{label}）: {matched}/{compared} 件")
+
+    baseline = bench(extract_bs4, pages, args.repeat)
+    print(f"\n{'実装':<24}{'時間':>10}{'高速化':>8}")
+    print(f"{'BeautifulSoup':<24}{baseline:>9.3f}s{1:>7.1f}x")
+    for label, func in candidates:
+        elapsed = bench(func, pages, args.repeat)
+        print(f"{label:<24}{elapsed:>9.3f}s{baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
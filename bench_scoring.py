@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+スコアリング（カテゴリ・重要度・順位の付与）のベンチマーク
+
+アーカイブ（archive/YYYYMM/）の記事（足りなければ合成した見出し）に対して
+scoring.Scorer.score を実行し、1秒あたりの件数とカテゴリの内訳を表示する。
+比較のため、キーワードごとに文を走査する素朴な照合（str.find の繰り返し）の速さも表示する。
+
+使い方:
+    python bench_scoring.py --rows 50000
+"""
+
+import argparse
+import json
+import random
+import time
+
+import pandas as pd
+
+import scoring
+from archive import ArticleArchive
+
+WORDS = ('日銀 利上げ 株価 決算 半導体 関税 円安 インフレ 速報 市場 政府 発表 見通し '
+         'fed stocks earnings inflation chip tariffs yields oil merger said after report').split()
+
+
+def load_frame(rows: int) -> pd.DataFrame:
+    archive = ArticleArchive()
+    frames = []
+    count = 0
+    for month in reversed(archive.months()):
+        frame = archive.read([month], columns=['source', 'title', 'summary'])
+        frames.append(frame)
+        count += len(frame)
+        if count >= rows:
+            break
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['source', 'title', 'summary'])
+    # 合成した見出しで補う
+    rng = random.Random(0)
+    synthetic = []
+    while len(df) + len(synthetic) < rows:
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 15)))
+        synthetic.append({'source': rng.choice(['Reuters', '日経新聞', 'CNBC']), 'title': title, 'summary': title})
+    if synthetic:
+        df = pd.concat([df, pd.DataFrame(synthetic)], ignore_index=True)
+    return df.head(rows).fillna('')
+
+
+def naive_count(df: pd.DataFrame, keywords) -> int:
+    """キーワードごとに全文を走査する素朴な照合（比較用）"""
+    matched = 0
+    for title, summary in zip(df['title'], df['summary']):
+        text = (title + ' ' + summary).lower()
+        matched += sum(1 for keyword in keywords if text.find(keyword) >= 0)
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='スコアリングのベンチマーク')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('scoring', {})
+    except FileNotFoundError:
+        settings = {}
+    df = load_frame(args.rows)
+
+    started = time.perf_counter()
+    scorer = scoring.Scorer(settings)
+    print(f"オートマトンの構築: {(time.perf_counter() - started) * 1000:.1f}ms"
+          f"（キーワード {len(scorer.automaton.patterns)}語）/ {len(df)}件\n")
+
+    started = time.perf_counter()
+    scorer.score(df)
+    elapsed = time.perf_counter() - started
+    print(f"{'Aho-Corasick':<16}{elapsed:>9.2f}s{len(df) / elapsed:>12.0f}件/秒")
+
+    keywords = [keyword.lower() for words in (settings.get('categories') or scoring.DEFAULT_CATEGORIES).values()
+                for keyword in words]
+    started = time.perf_counter()
+    naive_count(df, keywords)
+    elapsed = time.perf_counter() - started
+    print(f"{'素朴な照合':<16}{elapsed:>9.2f}s{len(df) / elapsed:>12.0f}件/秒")
+
+    print('\nカテゴリの内訳:')
+    for category, count in df['category'].value_counts().items():
+        print(f"  {category}: {count}件")
+
+
+if __name__ == '__main__':
+    main()
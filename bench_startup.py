@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+起動時間のベンチマーク（要約モデルの遅延読み込みの効果）
+
+以前は import scraper の時点で transformers・torch を import して要約モデルを読み込んでいた。
+それぞれ新しいプロセスで次の時間と最大メモリ使用量（RSS）を計測する。
+    import scraper: 現在の起動時間（モデルは読み込まない）
+    import scraper + モデル読み込み: 以前の import scraper に相当する時間
+
+使い方:
+    python bench_startup.py --repeat 3
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD = '''
+import json, resource, time
+started = time.perf_counter()
+import scraper
+imported = time.perf_counter() - started
+if {load}:
+    import summarizer
+    summarizer.get_summarizer({settings}).load()
+print(json.dumps({{"import": imported, "total": time.perf_counter() - started,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+'''
+
+
+def run(load: bool, settings: dict) -> dict:
+    code = CHILD.format(load=load, settings=repr(settings))
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='起動時間のベンチマーク')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('summarizer', {})
+    except FileNotFoundError:
+        settings = {}
+
+    print(f"{'条件':<32}{'所要時間':>10}{'最大RSS':>12}")
+    for label, load in (('import scraper', False), ('import scraper + モデル読み込み', True)):
+        results = [run(load, settings) for _ in range(args.repeat)]
+        seconds = statistics.median(result['total'] for result in results)
+        rss = statistics.median(result['rss_mb'] for result in results)
+        print(f"{label:<32}{seconds:>9.2f}s{rss:>10.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
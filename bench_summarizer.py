@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+要約のバッチ推論のベンチマーク（バッチサイズごとの1秒あたりの件数）
+
+アーカイブ（archive/YYYYMM/）の要約対象のタイトル（なければ合成した英文）を使い、
+summarizer.Summarizer.summarize_many をバッチサイズを変えて実行する。
+バッチサイズ 1 は従来の1件ずつの推論（df.apply）に相当する。
+
+使い方:
+    python bench_summarizer.py --rows 128 --batch-sizes 1 4 8 16 32
+"""
+
+import argparse
+import json
+import random
+import time
+
+import summarizer
+from archive import ArticleArchive
+
+WORDS = ('markets stocks investors central bank rates inflation outlook earnings guidance shares '
+         'bond yields dollar yen oil prices growth economy policy officials said on tuesday after '
+         'the quarterly report showed stronger than expected demand across regions').split()
+
+
+def load_texts(rows: int, settings: dict) -> list:
+    provider = summarizer.Summarizer(settings)
+    texts = []
+    archive = ArticleArchive()
+    for month in reversed(archive.months()):
+        titles = archive.read([month], columns=['title'])
+        texts.extend(title for title in titles.get('title', []) if provider.needs_summary(title))
+        if len(texts) >= rows:
+            return texts[:rows]
+    # 合成した長さのばらつきのある英文で補う
+    rng = random.Random(0)
+    while len(texts) < rows:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(20, 80))]
+        texts.append(' '.join(words).capitalize() + '.')
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='要約のバッチ推論のベンチマーク')
+    parser.add_argument('--rows', type=int, default=128)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('summarizer', {})
+    except FileNotFoundError:
+        settings = {}
+    # 推論の速さを測るため、要約キャッシュは使わない
+    settings = dict(settings, enabled=True, cache={'enabled': False},
+                    routing={'enabled': False})
+    texts = load_texts(args.rows, settings)
+
+    provider = summarizer.Summarizer(settings)
+    started = time.perf_counter()
+    if provider.load() is None:
+        return
+    print(f"モデル: {provider.model}（読み込み {time.perf_counter() - started:.1f}秒）/ {len(texts)}件\n")
+
+    baseline = None
+    print(f"{'バッチサイズ':<12}{'所要時間':>10}{'件/秒':>10}{'1件ずつとの一致':>16}")
+    # 一致率の基準にするため、バッチサイズ 1 を必ず最初に実行する
+    for batch_size in sorted(set(args.batch_sizes) | {1}):
+        provider.batch_size = batch_size
+        started = time.perf_counter()
+        summaries = provider.summarize_many(texts)
+        elapsed = time.perf_counter() - started
+        if baseline is None:
+            baseline = summaries
+        # パディングの有無で生成結果がわずかに変わることがあるため一致率も表示する
+        matched = sum(a == b for a, b in zip(baseline, summaries))
+        print(f"{batch_size:<12}{elapsed:>9.2f}s{len(texts) / elapsed:>10.1f}{matched:>10}/{len(texts)}")
+
+
+if __name__ == '__main__':
+    main()
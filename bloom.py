@@ -0,0 +1,198 @@
+"""
+メモリマップしたファイル上のブルームフィルタと、月ごとに切り替わる履歴
+
+既出記事ストア（SQLite）の前段で「確実に未出の記事」を照会なしで判定するために使う。
+ブルームフィルタは偽陽性はあるが偽陰性がないので、陰性なら DB を引かずに新着と判断できる。
+ファイルは Google Sheets のシートと同じ YYYYMM ごとに作り、保持期間を過ぎた月のファイルは削除する。
+1か月の件数が想定を超えた場合は、偽陽性率を下げた次のスライスを追加する（スケーラブルブルームフィルタ）。
+"""
+
+import glob
+import math
+import os
+import re
+import struct
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+MAGIC = b'NEWSBLM2'
+# マジック（8バイト）・ビット数・ハッシュ関数の数・登録件数・想定件数（各 8 バイト）
+HEADER = struct.Struct('<8sQQQQ')
+
+DEFAULT_DIRECTORY = 'bloom_history'
+DEFAULT_MONTHS = 7
+DEFAULT_CAPACITY = 200_000
+DEFAULT_FP_RATE = 0.001
+# スライスを追加するたびに偽陽性率に掛ける係数（合計の偽陽性率を抑える）
+TIGHTENING_RATIO = 0.5
+
+_SLICE_NAME = re.compile(r'^(\d{6})_(\d+)\.bloom$')
+
+
+def _as_uint64(hashes: Iterable[int]) -> np.ndarray:
+    # url_canon の符号付き 64 ビットハッシュをビット列はそのままに符号なしとして扱う
+    return np.asarray(list(hashes), dtype=np.int64).view(np.uint64)
+
+
+class BloomFilter:
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE):
+        """
+        ファイルにメモリマップしたブルームフィルタ（ファイルがあれば開き、なければ作成する）
+
+        既存のファイルを開くときは、ビット数・ハッシュ関数の数・想定件数はファイルのヘッダーの値を使う。
+
+        Args:
+            path (str): ファイルのパス
+            capacity (int): 想定する登録件数
+            fp_rate (float): capacity 件登録したときの偽陽性率
+        """
+        self.path = path
+        if not os.path.exists(path):
+            bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+            hashes = max(1, round(bits / capacity * math.log(2)))
+            size = math.ceil(bits / 8)
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, size * 8, hashes, 0, capacity))
+                f.truncate(HEADER.size + size)
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r+')
+        magic, self.num_bits, self.num_hashes, self.count, self.capacity = HEADER.unpack(
+            self._mm[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f'ブルームフィルタのファイルではありません: {path}')
+        self._bits = self._mm[HEADER.size:]
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        # 64 ビットハッシュの上位・下位 32 ビットから k 個の位置を作る（ダブルハッシング）
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """ハッシュごとに登録済みの可能性があるかを返す（False なら確実に未登録）"""
+        if not len(hashes):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(hashes)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        return np.all(self._bits[positions >> np.uint64(3)] & masks, axis=1)
+
+    def add(self, hashes: np.ndarray) -> int:
+        """ハッシュを登録し、新たに登録された件数を返す"""
+        if not len(hashes):
+            return 0
+        added = int(np.count_nonzero(~self.contains(hashes)))
+        positions = self._positions(hashes).ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self._bits, (positions >> np.uint64(3)).astype(np.intp), masks)
+        self.count += added
+        header = HEADER.pack(MAGIC, self.num_bits, self.num_hashes, self.count, self.capacity)
+        self._mm[:HEADER.size] = np.frombuffer(header, dtype=np.uint8)
+        return added
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def flush(self) -> None:
+        self._mm.flush()
+
+
+def _previous_months(month: str, n: int) -> List[str]:
+    """YYYYMM から遡って n か月分（当月を含む）の YYYYMM"""
+    year, mon = int(month[:4]), int(month[4:])
+    months = []
+    for _ in range(n):
+        months.append(f'{year:04d}{mon:02d}')
+        year, mon = (year, mon - 1) if mon > 1 else (year - 1, 12)
+    return months
+
+
+class BloomHistory:
+    def __init__(self, settings: Dict = None):
+        """
+        月ごとのブルームフィルタで直近 months か月の既出記事を記録する
+
+        Args:
+            settings (Dict): config.json の seen_store.bloom セクション
+                directory: ファイルの保存先
+                months: 保持する月数（当月を含む）
+                capacity: 1スライスの想定件数
+                fp_rate: 1スライスの偽陽性率
+        """
+        settings = settings or {}
+        self.directory = settings.get('directory', DEFAULT_DIRECTORY)
+        self.months = max(1, int(settings.get('months', DEFAULT_MONTHS)))
+        self.capacity = int(settings.get('capacity', DEFAULT_CAPACITY))
+        self.fp_rate = float(settings.get('fp_rate', DEFAULT_FP_RATE))
+        self._lock = threading.Lock()
+        self._month = None
+        self._filters: Dict[str, List[BloomFilter]] = {}
+        os.makedirs(self.directory, exist_ok=True)
+        # ファイルが1つもない状態で作られたか（既存の記録から作り直す必要があるか）
+        self.fresh = not glob.glob(os.path.join(self.directory, '*.bloom'))
+        self.rotate()
+
+    def _slice_path(self, month: str, index: int) -> str:
+        return os.path.join(self.directory, f'{month}_{index}.bloom')
+
+    def _open_slice(self, month: str, index: int) -> BloomFilter:
+        # 既存のスライスはヘッダーの想定件数で開く
+        return BloomFilter(self._slice_path(month, index), self.capacity,
+                           self.fp_rate * TIGHTENING_RATIO ** index)
+
+    def rotate(self) -> None:
+        """当月が変わっていれば保持期間外の月のファイルを削除し、当月のフィルタを用意する"""
+        # シート名と同じ YYYYMM（sheets を import すると Google の認証ライブラリまで読み込まれるため使わない）
+        month = datetime.now().strftime('%Y%m')
+        if month == self._month:
+            return
+        keep = set(_previous_months(month, self.months))
+        slices: Dict[str, List[int]] = {}
+        for path in glob.glob(os.path.join(self.directory, '*.bloom')):
+            match = _SLICE_NAME.match(os.path.basename(path))
+            if not match:
+                continue
+            if match.group(1) not in keep:
+                os.remove(path)
+                continue
+            slices.setdefault(match.group(1), []).append(int(match.group(2)))
+        self._filters = {m: [self._open_slice(m, i) for i in sorted(indexes)]
+                         for m, indexes in slices.items()}
+        if month not in self._filters:
+            self._filters[month] = [self._open_slice(month, 0)]
+        self._month = month
+
+    def might_contain(self, hashes: Iterable[int]) -> np.ndarray:
+        """ハッシュごとに直近の月に登録された可能性があるかを返す（False なら確実に未登録）"""
+        values = _as_uint64(hashes)
+        with self._lock:
+            self.rotate()
+            result = np.zeros(len(values), dtype=bool)
+            for filters in self._filters.values():
+                for bloom in filters:
+                    pending = ~result
+                    if not pending.any():
+                        return result
+                    result[pending] = bloom.contains(values[pending])
+            return result
+
+    def add(self, hashes: Iterable[int]) -> None:
+        """当月のフィルタに登録する（満杯ならスライスを追加する）"""
+        values = _as_uint64(hashes)
+        with self._lock:
+            self.rotate()
+            filters = self._filters[self._month]
+            start = 0
+            while start < len(values):
+                current = filters[-1]
+                if current.full:
+                    current = self._open_slice(self._month, len(filters))
+                    filters.append(current)
+                room = max(1, current.capacity - current.count)
+                current.add(values[start:start + room])
+                start += room
+            for bloom in filters:
+                bloom.flush()
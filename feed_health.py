@@ -0,0 +1,148 @@
+"""
+URL ごとの取得成否・レイテンシを記録し、失敗が続く URL を遮断するサーキットブレーカー
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_PATH = 'feed_health.json'
+# 連続でこの回数失敗したら遮断する
+DEFAULT_FAILURE_THRESHOLD = 3
+# 遮断後、試験的に1回だけ取得する（半開）までの秒数。遮断のたびに倍にする
+DEFAULT_COOLDOWN = 15 * 60
+DEFAULT_MAX_COOLDOWN = 24 * 3600
+# 半開の試験取得が結果を記録しないまま終わった場合に、次の試験取得を許可するまでの秒数
+PROBE_LEASE = 60
+# レイテンシのパーセンタイル計算に使う直近の件数
+LATENCY_WINDOW = 50
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーにより取得をスキップしたことを表す"""
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class HealthTracker:
+    def __init__(self, settings: Dict = None):
+        """
+        URL ごとの健全性記録とサーキットブレーカー
+
+        Args:
+            settings (Dict): config.json の health セクション
+                path: 保存先の JSON ファイル
+                failure_threshold: 遮断する連続失敗回数
+                cooldown / max_cooldown: 遮断から半開までの秒数と上限
+        """
+        settings = settings or {}
+        self.path = settings.get('path', DEFAULT_PATH)
+        self.failure_threshold = int(settings.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD))
+        self.cooldown = float(settings.get('cooldown', DEFAULT_COOLDOWN))
+        self.max_cooldown = float(settings.get('max_cooldown', DEFAULT_MAX_COOLDOWN))
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._records = json.load(f)
+        except Exception as e:
+            print(f"ソース健全性記録の読み込みエラー（記録なしで続行）: {e}")
+            self._records = {}
+
+    def _record(self, url: str) -> Dict:
+        record = self._records.get(url)
+        if record is None:
+            record = {
+                'successes': 0,
+                'failures': 0,
+                'consecutive_failures': 0,
+                'latencies': [],
+                'state': CLOSED,
+                'trips': 0,
+                'retry_at': 0,
+                'last_error': '',
+            }
+            self._records[url] = record
+        return record
+
+    def allow(self, url: str) -> bool:
+        """取得してよいか判定（遮断中でも待機時間を過ぎたら1回だけ試験取得を許可）"""
+        with self._lock:
+            record = self._records.get(url)
+            if record is None or record['state'] == CLOSED:
+                return True
+            now = time.time()
+            if now >= record['retry_at']:
+                record['state'] = HALF_OPEN
+                record['retry_at'] = now + PROBE_LEASE
+                return True
+            return False
+
+    def record_success(self, url: str, latency: float) -> None:
+        """取得成功を記録（半開なら遮断を解除）"""
+        with self._lock:
+            record = self._record(url)
+            record['successes'] += 1
+            record['consecutive_failures'] = 0
+            record['latencies'] = (record['latencies'] + [round(latency, 3)])[-LATENCY_WINDOW:]
+            record['state'] = CLOSED
+            record['trips'] = 0
+
+    def record_failure(self, url: str, latency: float, error: str) -> None:
+        """取得失敗を記録（連続失敗が閾値に達するか半開で失敗したら遮断）"""
+        with self._lock:
+            record = self._record(url)
+            record['failures'] += 1
+            record['consecutive_failures'] += 1
+            record['latencies'] = (record['latencies'] + [round(latency, 3)])[-LATENCY_WINDOW:]
+            record['last_error'] = error[:200]
+            if record['state'] == HALF_OPEN or record['consecutive_failures'] >= self.failure_threshold:
+                record['trips'] += 1
+                cooldown = min(self.max_cooldown, self.cooldown * 2 ** (record['trips'] - 1))
+                record['state'] = OPEN
+                record['retry_at'] = time.time() + cooldown
+
+    def summary(self, url: str) -> Dict:
+        """成功率・p50/p95 レイテンシ・連続失敗回数"""
+        with self._lock:
+            record = dict(self._record(url))
+        total = record['successes'] + record['failures']
+        return {
+            'success_rate': record['successes'] / total if total else None,
+            'p50': _percentile(record['latencies'], 0.5),
+            'p95': _percentile(record['latencies'], 0.95),
+            'consecutive_failures': record['consecutive_failures'],
+            'state': record['state'],
+            'retry_at': record['retry_at'],
+            'last_error': record['last_error'],
+        }
+
+    def tripped(self) -> List[str]:
+        """遮断中（半開を含む）の URL 一覧"""
+        with self._lock:
+            return [url for url, record in self._records.items() if record['state'] != CLOSED]
+
+    def save(self) -> None:
+        """記録をファイルに保存"""
+        with self._lock:
+            data = json.dumps(self._records, ensure_ascii=False)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,121 @@
+"""
+RSS 2.0 / Atom / RDF（RSS 1.0）を逐次解析する軽量パーサー
+
+必要な件数の記事を読み終えた時点で解析を打ち切る。XML として壊れているフィードや
+想定外の形式のみ feedparser にフォールバックする。
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+import run_stats
+
+# 一度にパーサーへ渡すバイト数
+CHUNK_SIZE = 16 * 1024
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+DC_NS = 'http://purl.org/dc/elements/1.1/'
+RDF_NS = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+
+# フィードのルート要素（名前空間を除いた名前）
+FEED_ROOTS = ('rss', 'feed', 'RDF')
+# 記事要素
+ENTRY_TAGS = ('item', 'entry')
+# 公開日時として採用する要素（優先順）
+DATE_TAGS = ('published', 'pubDate', 'date', 'updated')
+
+
+class UnsupportedFeedError(Exception):
+    """逐次パーサーが扱えない文書であることを表す"""
+
+
+def _split_tag(tag: str):
+    if tag.startswith('{'):
+        ns, local = tag[1:].split('}', 1)
+        return ns, local
+    return '', tag
+
+
+def _text(elem: ET.Element) -> str:
+    return ''.join(elem.itertext()).strip()
+
+
+def _entry_to_dict(elem: ET.Element) -> Dict[str, str]:
+    """item / entry 要素から title・link・published を取り出す"""
+    title = ''
+    link = ''
+    guid = ''
+    dates = {}
+    for child in elem:
+        ns, local = _split_tag(child.tag)
+        if local == 'title' and not title:
+            title = _text(child)
+        elif local == 'link' and not link:
+            if ns == ATOM_NS:
+                # Atom は rel="alternate"（省略時も alternate）の href を採用
+                if child.get('rel', 'alternate') == 'alternate':
+                    link = (child.get('href') or '').strip()
+            else:
+                link = _text(child)
+        elif local == 'guid' and child.get('isPermaLink', 'true') != 'false':
+            guid = _text(child)
+        elif local in DATE_TAGS and (local != 'date' or ns == DC_NS):
+            dates.setdefault(local, _text(child))
+    if not link:
+        link = guid or (elem.get(f'{{{RDF_NS}}}about') or '').strip()
+    published = next((dates[tag] for tag in DATE_TAGS if dates.get(tag)), '')
+    return {'title': title, 'link': link, 'published': published}
+
+
+def _parse_streaming(content: bytes, limit: Optional[int]) -> List[Dict[str, str]]:
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    entries = []
+    root_checked = False
+    for offset in range(0, len(content), CHUNK_SIZE):
+        parser.feed(content[offset:offset + CHUNK_SIZE])
+        for event, elem in parser.read_events():
+            if not root_checked:
+                root_checked = True
+                if _split_tag(elem.tag)[1] not in FEED_ROOTS:
+                    raise UnsupportedFeedError(elem.tag)
+            if event != 'end' or _split_tag(elem.tag)[1] not in ENTRY_TAGS:
+                continue
+            entries.append(_entry_to_dict(elem))
+            elem.clear()
+            if limit is not None and len(entries) >= limit:
+                # 必要な件数に達したら残りは読まない
+                return entries
+    parser.close()
+    return entries
+
+
+def _parse_with_feedparser(content: bytes, limit: Optional[int]) -> List[Dict[str, str]]:
+    import feedparser
+
+    parsed = feedparser.parse(content)
+    entries = parsed.entries if limit is None else parsed.entries[:limit]
+    return [{
+        'title': entry.get('title', ''),
+        'link': entry.get('link', ''),
+        'published': entry.get('published', '') or entry.get('updated', ''),
+    } for entry in entries]
+
+
+def parse_entries(content: bytes, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    フィードを解析し、先頭から最大 limit 件の記事（title, link, published）を返す
+
+    Args:
+        content (bytes): フィードの本文
+        limit (Optional[int]): 取り出す最大件数（None なら全件）
+
+    Returns:
+        List[Dict[str, str]]: 記事のリスト
+    """
+    try:
+        entries = _parse_streaming(content, limit)
+        run_stats.current.incr('フィード解析', '逐次パーサー')
+        return entries
+    except (ET.ParseError, UnsupportedFeedError, ValueError, LookupError):
+        run_stats.current.incr('フィード解析', 'feedparserへフォールバック')
+        return _parse_with_feedparser(content, limit)
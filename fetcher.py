@@ -0,0 +1,263 @@
+"""
+HTTP 取得の共通処理（共有セッション・全体の同時接続数の制限・条件付き GET・並列実行）
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import run_stats
+from articles import Article
+from feed_health import CircuitOpenError, HealthTracker
+from http_cache import HttpCache
+from politeness import PolitenessScheduler
+
+# 全ソース合計の同時リクエスト数の既定値（config.json の fetch.max_concurrency で変更可能）
+DEFAULT_MAX_CONCURRENCY = 16
+# 1つの並列処理で起動するスレッド数の上限
+MAX_THREADS = 64
+# 全リクエスト共通の User-Agent
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+# タイムアウト（接続, 読み込み）の秒数
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 10
+# ホストごとに保持する keep-alive 接続数の既定値
+DEFAULT_POOL_MAXSIZE = 4
+# 接続プールを保持するホスト数
+POOL_CONNECTIONS = 64
+
+_semaphore = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENCY)
+_cache: Optional[HttpCache] = None
+_session: Optional[requests.Session] = None
+_session_settings: Optional[Dict] = None
+_timeout = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+_scheduler = PolitenessScheduler()
+_scheduler_settings: Optional[Dict] = None
+_health: Optional[HealthTracker] = None
+# Retry-After を解釈するステータスコード
+RETRY_AFTER_STATUSES = (429, 503)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        run_stats.current.incr('HTTP接続', '新規接続数')
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        run_stats.current.incr('HTTP接続', '新規接続数')
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """新規に張った TCP/TLS 接続の数を数えるアダプタ"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def _build_session(settings: Dict) -> requests.Session:
+    """keep-alive 接続をホストごとにプールする共有セッションを作成"""
+    session = requests.Session()
+    session.headers['User-Agent'] = settings.get('user_agent', USER_AGENT)
+
+    default_size = int(settings.get('pool_maxsize', DEFAULT_POOL_MAXSIZE))
+    adapter = _CountingAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=default_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    # ホスト別のプールサイズ（例: {"www.nikkei.com": 8}）
+    for host, size in settings.get('pool_sizes', {}).items():
+        host_adapter = _CountingAdapter(pool_connections=1, pool_maxsize=int(size))
+        session.mount(f'https://{host}/', host_adapter)
+        session.mount(f'http://{host}/', host_adapter)
+    return session
+
+
+def configure(settings: Dict = None, cache_settings: Dict = None, politeness_settings: Dict = None,
+              health_settings: Dict = None) -> None:
+    """config.json の fetch / http_cache / politeness / health セクションから設定"""
+    global _semaphore, _cache, _session, _session_settings, _timeout, _scheduler, _scheduler_settings, _health
+    # 設定が変わらない限りスケジューラを使い回し、Retry-After などのホストごとの状態を実行をまたいで保つ
+    politeness_settings = dict(politeness_settings or {})
+    if politeness_settings != _scheduler_settings:
+        _scheduler = PolitenessScheduler(politeness_settings)
+        _scheduler_settings = politeness_settings
+    health_settings = health_settings or {}
+    if health_settings.get('enabled', True):
+        if _health is None or _health.path != health_settings.get('path', _health.path):
+            _health = HealthTracker(health_settings)
+    else:
+        _health = None
+    settings = settings or {}
+    max_concurrency = max(1, int(settings.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)))
+    _semaphore = threading.BoundedSemaphore(max_concurrency)
+    _timeout = (float(settings.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+                float(settings.get('read_timeout', DEFAULT_READ_TIMEOUT)))
+
+    # 設定が変わらない限りセッションを使い回し、接続を温かいまま保つ
+    if _session is None or settings != _session_settings:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(settings)
+        _session_settings = dict(settings)
+
+    cache_settings = cache_settings or {}
+    if cache_settings.get('enabled', True):
+        path = cache_settings.get('path', 'http_cache.json')
+        if _cache is None or _cache.path != path:
+            _cache = HttpCache(path, cache_settings.get('max_age_days', 30))
+    else:
+        _cache = None
+
+
+def get_session() -> requests.Session:
+    """共有セッションを返す（未設定なら既定値で作成）"""
+    global _session, _session_settings
+    if _session is None:
+        _session = _build_session({})
+        _session_settings = {}
+    return _session
+
+
+def finish_run() -> None:
+    """1回の収集の終わりに接続再利用数を記録し、キャッシュを保存"""
+    counters = run_stats.current.counters.get('HTTP接続', {})
+    reused = counters.get('リクエスト数', 0) - counters.get('新規接続数', 0)
+    run_stats.current.incr('HTTP接続', '接続再利用数', max(0, reused))
+
+    if _health is not None:
+        report_tripped()
+        try:
+            _health.save()
+        except Exception as e:
+            print(f"ソース健全性記録の保存エラー: {e}")
+
+    if _cache is None:
+        return
+    try:
+        _cache.save()
+    except Exception as e:
+        print(f"HTTPキャッシュの保存エラー: {e}")
+
+
+def report_tripped() -> List[str]:
+    """サーキットブレーカーで遮断中の URL を表示し、実行統計に記録する"""
+    if _health is None:
+        return []
+    tripped = _health.tripped()
+    if tripped:
+        print(f"\n=== 遮断中のソース ({len(tripped)}件) ===")
+    for url in tripped:
+        summary = _health.summary(url)
+        run_stats.current.incr('遮断中のURL（連続失敗回数）', url, summary['consecutive_failures'])
+        rate = 'N/A' if summary['success_rate'] is None else f"{summary['success_rate']:.0%}"
+        p50 = 'N/A' if summary['p50'] is None else f"{summary['p50']:.2f}秒"
+        p95 = 'N/A' if summary['p95'] is None else f"{summary['p95']:.2f}秒"
+        print(f"  {url}")
+        print(f"    成功率: {rate} / p50: {p50} / p95: {p95} / "
+              f"連続失敗: {summary['consecutive_failures']}回 / 最終エラー: {summary['last_error']}")
+    return tripped
+
+
+@contextmanager
+def slot():
+    """ネットワークアクセス1回分の実行枠を確保する"""
+    semaphore = _semaphore
+    with semaphore:
+        yield
+
+
+def get(url: str, headers: Dict = None, track_health: bool = True) -> requests.Response:
+    """
+    ドメイン別の制限と全体の同時実行数の制限内で、共有セッションから GET リクエストを送信
+
+    429/503 の Retry-After が許容範囲内なら、そのドメインを待機させて1回だけ再試行する。
+    track_health を False にすると URL ごとの健全性を記録しない（記事本文など一度きりの URL 用）。
+    """
+    session = get_session()
+    scheduler = _scheduler
+    health = _health if track_health else None
+    if health is not None and not health.allow(url):
+        run_stats.current.incr('サーキットブレーカー', 'スキップ')
+        raise CircuitOpenError(f"失敗が続いているため取得をスキップ: {url}")
+
+    for attempt in range(2):
+        # ドメインの枠を先に確保し、混んでいるドメインの待ちで全体の枠を塞がない
+        with scheduler.acquire(url):
+            with slot():
+                run_stats.current.incr('HTTP接続', 'リクエスト数')
+                started = time.perf_counter()
+                try:
+                    response = session.get(url, headers=headers, timeout=_timeout)
+                except requests.RequestException as e:
+                    if health is not None:
+                        health.record_failure(url, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+                    raise
+                latency = time.perf_counter() - started
+        if health is not None:
+            if response.status_code >= 400:
+                health.record_failure(url, latency, f"HTTP {response.status_code}")
+            else:
+                health.record_success(url, latency)
+        if attempt == 0 and response.status_code in RETRY_AFTER_STATUSES:
+            delay = scheduler.defer(url, response.headers.get('Retry-After'))
+            if delay is not None and delay <= scheduler.max_retry_after:
+                run_stats.current.incr('Retry-After', urlparse(url).netloc)
+                continue
+        return response
+    return response
+
+
+def fetch_page(url: str, headers: Dict = None) -> Tuple[Optional[List[Article]], Optional[requests.Response]]:
+    """
+    条件付き GET で URL を取得する
+
+    Returns:
+        304 Not Modified で前回の記事を再利用できる場合は (記事, None)、
+        それ以外は (None, レスポンス)。解析した記事は store_items() で保存する
+    """
+    cache = _cache
+    request_headers = dict(headers or {})
+    if cache is not None:
+        request_headers.update(cache.conditional_headers(url))
+
+    response = get(url, headers=request_headers)
+    if response.status_code == 304 and cache is not None:
+        items = cache.cached_items(url)
+        if items is not None:
+            run_stats.current.incr('HTTPキャッシュ', '304（再利用）')
+            return items, None
+    response.raise_for_status()
+
+    run_stats.current.incr('HTTPキャッシュ', '200（解析）')
+    run_stats.current.incr('HTTPキャッシュ', '受信バイト数', len(response.content))
+    return None, response
+
+
+def store_items(url: str, response_headers, items: List[Article]) -> None:
+    """解析した記事を次回の 304 応答用に保存"""
+    cache = _cache
+    if cache is not None:
+        cache.store(url, response_headers, items)
+
+
+def map_ordered(func: Callable, args: Iterable) -> List:
+    """func を引数ごとに並列実行し、入力と同じ順序で結果を返す"""
+    args = list(args)
+    if len(args) <= 1:
+        return [func(arg) for arg in args]
+    with ThreadPoolExecutor(max_workers=min(len(args), MAX_THREADS)) as executor:
+        return list(executor.map(func, args))
@@ -0,0 +1,93 @@
+"""
+条件付き GET（ETag / Last-Modified）用の検証子と抽出済み記事を URL ごとに保存するキャッシュ
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from articles import Article
+
+DEFAULT_PATH = 'http_cache.json'
+# この日数以上参照されなかったエントリは保存時に削除する
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+class HttpCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        """
+        HTTP 検証子キャッシュ
+
+        Args:
+            path (str): 保存先の JSON ファイル
+            max_age_days (float): 未使用エントリを保持する日数
+        """
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            print(f"HTTPキャッシュの読み込みエラー（キャッシュなしで続行）: {e}")
+            self._entries = {}
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """前回の検証子から条件付きリクエスト用ヘッダーを作成"""
+        with self._lock:
+            entry = self._entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def cached_items(self, url: str) -> Optional[List[Article]]:
+        """304 応答時に再利用する記事（fetched_at は現在時刻に更新）"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            entry['used_at'] = time.time()
+            items = entry['items']
+        fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        return [Article.from_dict(item, fetched_at=fetched_at) for item in items]
+
+    def store(self, url: str, response_headers, items: List[Article]) -> None:
+        """検証子付きの応答なら記事と一緒に保存"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(url, None)
+                return
+            self._entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'used_at': time.time(),
+                'items': [dict(item) for item in items],
+            }
+
+    def save(self) -> None:
+        """古いエントリを削除してファイルに書き出す"""
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            self._entries = {url: entry for url, entry in self._entries.items()
+                             if entry.get('used_at', 0) >= cutoff}
+            data = json.dumps(self._entries, ensure_ascii=False)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
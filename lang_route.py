@@ -0,0 +1,115 @@
+"""
+要約の振り分け（文字の種類の比率による言語判定と、日本語向けの軽量な要約）
+
+要約モデル（distilbart-cnn）は英語のニュースで学習されており、日本語の見出しを渡しても
+時間がかかるうえ意味のない出力になる。モデルを使わずに文字の種類（かな・漢字・ラテン文字）の
+比率で言語を判定し、英語はモデル、日本語は文の区切りで切り詰める抽出型の要約、
+それ以外は要約しない（元の文のまま）に振り分ける。
+"""
+
+import re
+import unicodedata
+from typing import Dict
+
+# 振り分け先
+MODEL = 'model'
+EXTRACT = 'extract'
+SKIP = 'skip'
+ROUTES = (MODEL, EXTRACT, SKIP)
+
+DEFAULT_ROUTES = {'en': MODEL, 'ja': EXTRACT, 'other': SKIP}
+# 文字（空白・記号・数字以外）のうち、かな・漢字がこの割合以上なら日本語
+DEFAULT_JA_RATIO = 0.2
+# 文字のうち、ラテン文字がこの割合以上なら英語
+DEFAULT_EN_RATIO = 0.6
+# 日本語の抽出型要約の最大文字数
+DEFAULT_JA_MAX_CHARS = 80
+
+_SENTENCE_END = re.compile(r'(?<=[。！？!?])')
+# 切り詰めるときに区切りとして使う文字（この直後で切る）
+_BREAK_CHARS = '、，,　 」）)'
+
+
+def _is_japanese(ch: str) -> bool:
+    code = ord(ch)
+    return (0x3040 <= code <= 0x30FF      # ひらがな・カタカナ
+            or 0x3400 <= code <= 0x4DBF   # CJK 統合漢字拡張 A
+            or 0x4E00 <= code <= 0x9FFF   # CJK 統合漢字
+            or 0xFF66 <= code <= 0xFF9D   # 半角カタカナ
+            or ch in '々〆ー')
+
+
+def detect_language(text: str, ja_ratio: float = DEFAULT_JA_RATIO, en_ratio: float = DEFAULT_EN_RATIO) -> str:
+    """文字の種類の比率で言語を判定する（'ja' / 'en' / 'other'）"""
+    japanese = latin = letters = 0
+    for ch in text:
+        if _is_japanese(ch):
+            japanese += 1
+            letters += 1
+        elif ch.isalpha():
+            letters += 1
+            if ch.isascii() or unicodedata.name(ch, '').startswith('LATIN'):
+                latin += 1
+    if not letters:
+        return 'other'
+    if japanese / letters >= ja_ratio:
+        return 'ja'
+    if latin / letters >= en_ratio:
+        return 'en'
+    return 'other'
+
+
+def extract_summary(text: str, max_chars: int = DEFAULT_JA_MAX_CHARS) -> str:
+    """
+    日本語の文を抽出型で要約する
+
+    先頭から文（。！？ で区切る）を max_chars に収まるだけ残す。最初の文が長すぎるときは
+    max_chars 以内の最後の読点などで切り、「…」を付ける。
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    summary = ''
+    for sentence in _SENTENCE_END.split(text):
+        if not sentence or len(summary) + len(sentence) > max_chars:
+            break
+        summary += sentence
+    if summary:
+        return summary
+    head = text[:max_chars - 1]
+    cut = max(head.rfind(ch) for ch in _BREAK_CHARS)
+    # 区切りが前半にしかなければ、区切りを無視して文字数で切る
+    if cut >= max_chars // 2:
+        head = head[:cut + 1]
+    return head.rstrip('、，,　 ') + '…'
+
+
+class Router:
+    def __init__(self, settings: Dict = None):
+        """
+        言語ごとの要約の振り分け
+
+        Args:
+            settings (Dict): config.json の summarizer.routing セクション
+                routes: 言語（en / ja / other）ごとの振り分け先（model / extract / skip）
+                ja_ratio / en_ratio: 日本語・英語と判定する文字の割合
+                ja_max_chars: 抽出型要約の最大文字数
+        """
+        settings = settings or {}
+        self.routes = dict(DEFAULT_ROUTES)
+        for language, route in settings.get('routes', {}).items():
+            if route not in ROUTES:
+                print(f"不明な要約の振り分け先 {route!r}（{language}）のため {self.routes.get(language, SKIP)} を使います")
+                continue
+            self.routes[language] = route
+        self.ja_ratio = float(settings.get('ja_ratio', DEFAULT_JA_RATIO))
+        self.en_ratio = float(settings.get('en_ratio', DEFAULT_EN_RATIO))
+        self.ja_max_chars = int(settings.get('ja_max_chars', DEFAULT_JA_MAX_CHARS))
+
+    def route(self, text: str):
+        """(言語, 振り分け先) を返す"""
+        language = detect_language(text, self.ja_ratio, self.en_ratio)
+        return language, self.routes.get(language, SKIP)
+
+    def extract(self, text: str) -> str:
+        return extract_summary(text, self.ja_max_chars)
@@ -0,0 +1,252 @@
+"""
+HTML ページからリンク（href とリンクテキスト）だけを取り出す軽量な抽出器
+
+BeautifulSoup のようにページ全体のツリーを組み立てず、<a href> とそのテキストだけを集める。
+文字コードは Content-Type ヘッダー → BOM → <meta charset> の順で宣言されたものを使い、
+推測は行わない。lxml がインストールされていれば lxml（C 実装）を、なければ標準ライブラリの
+html.parser を使う。
+"""
+
+import codecs
+import re
+import threading
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+import run_stats
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # lxml は任意
+    lxml = None
+
+# <meta charset> を探す範囲（先頭バイト数）
+META_SNIFF_BYTES = 4096
+DEFAULT_CHARSET = 'utf-8'
+# 宣言された名前より広い文字集合で読む（Shift_JIS の機種依存文字など）
+CHARSET_ALIASES = {
+    'shift_jis': 'cp932',
+    'shift-jis': 'cp932',
+    'sjis': 'cp932',
+    'x-sjis': 'cp932',
+}
+
+BACKENDS = ('lxml', 'html.parser')
+DEFAULT_BACKEND = 'lxml' if lxml is not None else 'html.parser'
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+# 中のテキストをリンクテキストに含めない要素
+_SKIP_TEXT_TAGS = ('script', 'style')
+
+Link = Tuple[str, str]
+
+
+def _normalize_charset(name) -> Optional[str]:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', 'ignore')
+    name = CHARSET_ALIASES.get(name.lower(), name.lower())
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content: bytes, content_type: Optional[str] = None) -> str:
+    """
+    宣言された文字コードを返す（ヘッダー → BOM → <meta charset>、どれもなければ utf-8）
+
+    Args:
+        content (bytes): ページの本文
+        content_type (Optional[str]): レスポンスの Content-Type ヘッダー
+
+    Returns:
+        str: Python のコーデック名
+    """
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        charset = match and _normalize_charset(match.group(1))
+        if charset:
+            return charset
+    if content.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    match = _META_CHARSET.search(content[:META_SNIFF_BYTES])
+    charset = match and _normalize_charset(match.group(1))
+    return charset or DEFAULT_CHARSET
+
+
+def _parse_container(container: Optional[str]):
+    """"tag" / "#id" / ".class" / "tag#id" / "tag.class" を (tag, id, class) に分解"""
+    if not container:
+        return None
+    match = re.fullmatch(r'([\w-]*)(?:#([\w-]+)|\.([\w-]+))?', container.strip())
+    if not match or not any(match.groups()):
+        raise ValueError(f'未対応のコンテナ指定です: {container}')
+    tag, id_, class_ = match.groups()
+    return (tag or '').lower(), id_, class_
+
+
+def _matches(selector, tag: str, id_: Optional[str], class_: Optional[str]) -> bool:
+    want_tag, want_id, want_class = selector
+    if want_tag and tag != want_tag:
+        return False
+    if want_id and id_ != want_id:
+        return False
+    if want_class and want_class not in (class_ or '').split():
+        return False
+    return True
+
+
+class _AnchorParser(HTMLParser):
+    """<a href> の href とテキストだけを集める html.parser のハンドラ"""
+
+    def __init__(self, selector=None):
+        super().__init__(convert_charrefs=True)
+        self.selector = selector
+        self.links: List[Link] = []
+        self.container_links: List[Link] = []
+        self.container_found = False
+        # コンテナ要素と同じタグの入れ子の深さ（0 ならコンテナの外）
+        self._container_depth = 0
+        self._container_tag = None
+        self._skip_depth = 0
+        self._href = None
+        self._text: List[str] = []
+
+    def _close_anchor(self):
+        if self._href is None:
+            return
+        link = (self._href, ''.join(self._text))
+        self.links.append(link)
+        if self._container_depth:
+            self.container_links.append(link)
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._container_depth:
+            if tag == self._container_tag:
+                self._container_depth += 1
+        elif self.selector is not None:
+            attrs_map = dict(attrs)
+            if _matches(self.selector, tag, attrs_map.get('id'), attrs_map.get('class')):
+                self.container_found = True
+                self._container_tag = tag
+                self._container_depth = 1
+        if tag == 'a':
+            # 閉じられていない <a> は次の <a> で閉じる（ブラウザと同じ扱い）
+            self._close_anchor()
+            for name, value in attrs:
+                if name == 'href' and value:
+                    self._href = value
+                    break
+        elif tag in _SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self._close_anchor()
+        elif tag in _SKIP_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if self._container_depth and tag == self._container_tag:
+            self._container_depth -= 1
+
+    def handle_data(self, data):
+        if self._href is not None and not self._skip_depth:
+            data = data.strip()
+            if data:
+                self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._close_anchor()
+
+
+def _extract_html_parser(content: bytes, charset: str, selector) -> List[Link]:
+    parser = _AnchorParser(selector)
+    parser.feed(content.decode(charset, errors='replace'))
+    parser.close()
+    if selector is not None and parser.container_found:
+        return parser.container_links
+    return parser.links
+
+
+_lxml_parsers = threading.local()
+
+
+def lxml_parser(charset: str):
+    """このスレッド用の lxml の HTML パーサー（lxml のパーサーはスレッド間で共有しない）"""
+    parsers = getattr(_lxml_parsers, 'by_charset', None)
+    if parsers is None:
+        parsers = _lxml_parsers.by_charset = {}
+    if charset not in parsers:
+        parsers[charset] = lxml.html.HTMLParser(encoding=charset, remove_comments=True, remove_pis=True)
+    return parsers[charset]
+
+
+def _anchor_text(anchor) -> str:
+    parts = [anchor.text] if anchor.text else []
+    for node in anchor.iterdescendants():
+        if node.text and node.tag not in _SKIP_TEXT_TAGS:
+            parts.append(node.text)
+        if node.tail:
+            parts.append(node.tail)
+    return ''.join(part.strip() for part in parts)
+
+
+def _extract_lxml(content: bytes, charset: str, selector) -> List[Link]:
+    root = lxml.html.document_fromstring(content, parser=lxml_parser(charset))
+    roots = [root]
+    if selector is not None:
+        candidates = root.iter(selector[0]) if selector[0] else root.iter()
+        found = [elem for elem in candidates
+                 if isinstance(elem.tag, str) and _matches(selector, elem.tag, elem.get('id'), elem.get('class'))]
+        # 入れ子になったコンテナは外側だけを使う
+        found_set = set(found)
+        roots = [elem for elem in found if not any(a in found_set for a in elem.iterancestors())] or roots
+    links = []
+    for container in roots:
+        for anchor in container.iter('a'):
+            href = anchor.get('href')
+            if href:
+                links.append((href, _anchor_text(anchor)))
+    return links
+
+
+def extract_links(content: bytes, content_type: Optional[str] = None, container: Optional[str] = None,
+                  backend: Optional[str] = None) -> List[Link]:
+    """
+    ページ内の <a href> を文書順に (href, リンクテキスト) で返す
+
+    リンクテキストは BeautifulSoup の get_text(strip=True) と同じく、各テキストを strip して
+    連結したもの。
+
+    Args:
+        content (bytes): ページの本文
+        content_type (Optional[str]): レスポンスの Content-Type ヘッダー（文字コードの判定に使う）
+        container (Optional[str]): リンクを探す要素（"main", "#news", "div.list" など）。
+            ページ内に見つからなければページ全体から探す
+        backend (Optional[str]): "lxml" または "html.parser"（省略時は使える中で速いもの）
+
+    Returns:
+        List[Tuple[str, str]]: (href, テキスト) のリスト
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f'未対応のバックエンドです: {backend}')
+    selector = _parse_container(container)
+    charset = detect_charset(content, content_type)
+    if backend == 'lxml' and lxml is not None:
+        try:
+            links = _extract_lxml(content, charset, selector)
+            run_stats.current.incr('HTML解析', 'lxml')
+            return links
+        except (lxml.etree.ParserError, LookupError, ValueError):
+            # 空の文書や lxml が扱えない文字コードは html.parser で読む
+            pass
+    links = _extract_html_parser(content, charset, selector)
+    run_stats.current.incr('HTML解析', 'html.parser')
+    return links
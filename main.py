@@ -1,129 +1,247 @@
-import json
-import pandas as pd
-from scraper import collect_all
-from sheets import write_to_sheet
-from auth import get_sheets_client
-from slack_notifier import SlackNotifier
-import traceback
+import argparse
 import datetime
+import json
 import os
+import traceback
+from typing import Callable, Dict, List
+
+import pandas as pd
 from dotenv import load_dotenv
 
-def load_config():
-    """設定ファイルを読み込む"""
-    with open('config.json', 'r', encoding='utf-8') as f:
+import parse_pool
+import seen_store
+import summarizer
+from archive import ArticleArchive
+from polling import PollingSchedule
+from scraper import collect_all
+from search_index import DEFAULT_PATH as SEARCH_INDEX_PATH, SearchIndex
+from sources import load_sources
+from sheets import write_to_sheet, get_current_sheet_name
+
+# デーモンモードでポーリング対象を確認する間隔（秒）
+DEFAULT_TICK_SECONDS = 60
+# デーモンモードで、1件も取得できないポーリングがこの回数続いたら通知する
+DEFAULT_EMPTY_ALERT_TICKS = 5
+
+def load_config(path: str = 'config.json') -> Dict:
+    """設定ファイルを読み込む（Slack のトークン・チャンネルは .env / 環境変数で上書きできる）"""
+    with open(path, 'r', encoding='utf-8') as f:
         config = json.load(f)
     # .envの読み込み
     load_dotenv()
     # Slack情報を環境変数で上書き
-    if 'slack' not in config:
-        config['slack'] = {}
-    config['slack']['token'] = os.getenv('SLACK_TOKEN', config['slack'].get('token'))
-    config['slack']['channel'] = os.getenv('SLACK_CHANNEL', config['slack'].get('channel'))
+    slack = config.setdefault('slack', {})
+    slack['token'] = os.getenv('SLACK_TOKEN', slack.get('token'))
+    slack['channel'] = os.getenv('SLACK_CHANNEL', slack.get('channel'))
     return config
 
-def get_current_sheet_name():
-    """現在の年月を取得してシート名を生成"""
-    current_date = datetime.datetime.now()
-    return current_date.strftime("%Y%m")  # 例: 202507, 202508
+class Clients:
+    def __init__(self, config: Dict):
+        """
+        Google Sheets / Slack のクライアントを初回利用時に作成し、以降は使い回す
+
+        Args:
+            config (Dict): config.json の内容
+        """
+        self.config = config
+        self._sheets = None
+        self._slack = None
+        self._warned_slack = False
+
+    def notify_error(self, message: str) -> None:
+        """エラーを表示し、Slack が使えれば通知する"""
+        print(message)
+        slack = self.slack()
+        if slack is not None:
+            slack.send_error_notification(message)
+
+    def sheets(self):
+        """認証済みの gspread クライアント"""
+        settings = self.config.get('google_sheets', {})
+        if self._sheets is None:
+            from auth import get_sheets_client
+            self._sheets = get_sheets_client(settings['client_id'], settings['client_secret'])
+        return self._sheets
+
+    def slack(self):
+        """SlackNotifier（無効・未設定なら None）"""
+        settings = self.config.get('slack', {})
+        if not settings.get('enabled'):
+            return None
+        if not settings.get('token'):
+            if not self._warned_slack:
+                print('Slack通知が有効ですが token が設定されていません（config.json の slack.token か環境変数 SLACK_TOKEN）')
+                self._warned_slack = True
+            return None
+        if self._slack is None:
+            from slack_notifier import SlackNotifier
+            self._slack = SlackNotifier(settings['token'], settings.get('channel') or '#scraping')
+        return self._slack
+
+def print_stats(df: pd.DataFrame):
+    """取得結果の統計を表示"""
+    print(f'Total articles: {len(df)}')
+    print(f'Sources: {df["source"].value_counts().to_dict()}')
+
+    print('\n=== 詳細統計 ===')
+    print(f'総記事数: {len(df)}')
+    print('\nソース別記事数:')
+    source_counts = df['source'].value_counts()
+    for source, count in source_counts.items():
+        print(f'  {source}: {count}件')
+
+    print('\n最新記事（各ソースから1件ずつ）:')
+    for source in df['source'].unique():
+        source_df = df[df['source'] == source]
+        latest = source_df.iloc[0]
+        print(f'  [{source}] {latest["title"]}')
+
+def job(config: Dict, clients: Clients = None, feeds: List[Dict] = None, source_specs: List[Dict] = None,
+        on_source_done: Callable[[str, List[Dict]], None] = None, notify_empty: bool = True) -> pd.DataFrame:
+    """
+    ニュースを収集し、Google Sheets への書き込みと Slack 通知を行う
+
+    notify_empty が False のときは、1件も取得できなくても通知せずに表示だけする（呼び出し側で判断する）。
+    """
+    clients = clients or Clients(config)
+    if feeds is None:
+        feeds = config['rss_feeds']
+    df = collect_all(feeds, config, source_specs=source_specs, on_source_done=on_source_done)
+    if df.empty:
+        collected = df.attrs.get('run_stats', {}).get('counters', {}).get('収集', {}).get('記事数', 0)
+        if collected:
+            print('新しい記事はありませんでした')
+        elif notify_empty:
+            clients.notify_error('ニュースの収集に失敗しました')
+        else:
+            print('ニュースを1件も取得できませんでした')
+        return df
+    print_stats(df)
 
-def job():
-    """メインのジョブ関数"""
+    # 書き込めなかった記事は既出として登録しない（次回の実行でもう一度書き込む）
+    if not config.get('google_sheets', {}).get('spreadsheet_id'):
+        clients.notify_error('Google Sheets の spreadsheet_id が設定されていないため書き込めません')
+        return df
     try:
-        print("Starting news collection job...")
-        
-        # 設定を読み込み
-        config = load_config()
-        
-        # Slack通知を初期化
-        slack_enabled = config.get('slack', {}).get('enabled', False)
-        slack_notifier = None
-        
-        if slack_enabled:
-            slack_config = config['slack']
-            slack_notifier = SlackNotifier(
-                token=slack_config['token'],
-                channel=slack_config['channel']
-            )
-            print("Slack通知機能が有効化されました")
-        
-        # ニュースを収集
-        df = collect_all(config.get('rss_feeds', []))
-        
-        if df.empty:
-            error_msg = "ニュースの収集に失敗しました"
-            print(error_msg)
-            if slack_notifier:
-                slack_notifier.send_error_notification(error_msg)
-            return
-        
-        print(f"Job executed: {len(df)} articles collected.")
-        print("Sample articles:")
-        print(df.head())
-        
-        # Google Sheets認証
-        print("Starting Google Sheets authentication...")
+        sheets_client = clients.sheets()
+    except Exception as e:
+        clients.notify_error(f'Google Sheets認証に失敗しました: {e}')
+        return df
+    try:
+        write_to_sheet(df, config, client=sheets_client)
+    except Exception as e:
+        clients.notify_error(f'Google Sheetsへの書き込みに失敗しました: {e}')
+        return df
+
+    # 書き込みが済んだ記事はすぐに既出として登録し、次回以降の出力から除く
+    # （この後のアーカイブや検索インデックスが失敗しても、同じ記事をシートに二度書かない）
+    store = seen_store.get_store(config.get('seen_store'))
+    if store is not None:
+        store.mark_seen(seen_store.emitted_hashes(df))
+        store.prune()
+
+    # 全列をローカルのアーカイブに保存（Google Sheets には source・title・link のみ）
+    archive_path = None
+    archive_settings = config.get('archive', {})
+    if archive_settings.get('enabled', True):
+        try:
+            archive_path = ArticleArchive(archive_settings).append(df)
+            print(f'アーカイブに保存しました: {archive_path}')
+        except Exception as e:
+            clients.notify_error(f'アーカイブへの保存に失敗しました: {e}')
+
+    slack = clients.slack()
+    if slack is not None:
+        sources = df['source'].value_counts().to_dict()
+        slack.send_news_summary(df, len(df), sources, get_current_sheet_name(), archive_path)
+
+    # タイトルと要約を全文検索インデックスに追加（python search_index.py で検索）
+    index_settings = config.get('search_index', {})
+    if index_settings.get('enabled', True):
         try:
-            gc = get_sheets_client(
-                config['google_sheets']['client_id'],
-                config['google_sheets']['client_secret']
-            )
-            print("Google Sheets認証成功")
+            index = SearchIndex(index_settings.get('path', SEARCH_INDEX_PATH))
+            try:
+                print(f'検索インデックスに追加しました: {index.add(df)}件（計{len(index)}件）')
+            finally:
+                index.close()
         except Exception as e:
-            error_msg = f"Google Sheets認証に失敗しました: {str(e)}"
-            print(error_msg)
-            if slack_notifier:
-                slack_notifier.send_error_notification(error_msg)
+            clients.notify_error(f'検索インデックスへの追加に失敗しました: {e}')
+    return df
+
+def run_daemon(config: Dict):
+    """常駐し、ソースごとに学習したポーリング間隔で job() を繰り返す"""
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    settings = config.get('daemon', {})
+    schedule = PollingSchedule(settings)
+    # 要約モデル・認証済みクライアント・HTTP セッションは常駐中ずっと使い回す
+    clients = Clients(config)
+    specs = load_sources(config)
+    # 解析ワーカーはスケジューラのスレッドが動き出す前に起動しておく
+    parse_pool.get_pool(config.get('parse'))
+    # 要約モデルは最初のポーリングを待たずにバックグラウンドで読み込み始める
+    summarizer.get_summarizer(config.get('summarizer')).preload()
+    # 対象のソースがすべて失敗・延期・空だったポーリングが続いた回数
+    # （1回ごとに通知すると、ソースが1つしかない時間帯などに通知が溢れる）
+    empty_alert_ticks = max(1, int(settings.get('empty_alert_ticks', DEFAULT_EMPTY_ALERT_TICKS)))
+    empty_ticks = 0
+
+    def tick():
+        nonlocal empty_ticks
+        keys = [feed['name'] for feed in config['rss_feeds']] + [spec['name'] for spec in specs]
+        due = set(schedule.due(keys))
+        if not due:
             return
-        
-        # シート名を取得
-        sheet_name = get_current_sheet_name()
-        print(f"Target sheet: {sheet_name}")
-        
-        # Google Sheetsに書き込み
+        feeds = [feed for feed in config['rss_feeds'] if feed['name'] in due]
+        due_specs = [spec for spec in specs if spec['name'] in due]
+        print(f"\n[{datetime.datetime.now():%Y-%m-%d %H:%M:%S}] ポーリング対象: {len(due)}ソース")
+
+        def on_source_done(name: str, items: List[Dict]):
+            new_count = schedule.record(name, [item.get('link', '') for item in items])
+            print(f"  {name}: 新着 {new_count}件（次回まで {schedule.interval(name) / 60:.0f}分）")
+
         try:
-            write_to_sheet(df, config)
-            print("Successfully wrote to Google Sheets!")
-            
-            # Slack通知を送信
-            if slack_notifier:
-                # ソース別記事数を計算
-                sources = df['source'].value_counts().to_dict()
-                total_articles = len(df)
-                
-                # 成功通知を送信（シート名を含む）
-                slack_success = slack_notifier.send_news_summary(df, total_articles, sources, sheet_name)
-                if slack_success:
-                    print("Slack通知送信完了")
-                else:
-                    print("Slack通知送信に失敗しました")
+            df = job(config, clients, feeds, due_specs, on_source_done, notify_empty=False)
+            collected = df.attrs.get('run_stats', {}).get('counters', {}).get('収集', {}).get('記事数', 0)
+            empty_ticks = 0 if collected else empty_ticks + 1
+            if empty_ticks == empty_alert_ticks:
+                clients.notify_error(f'ニュースの収集に{empty_ticks}回続けて失敗しました')
         except Exception as e:
-            error_msg = f"Google Sheetsへの書き込みに失敗しました: {str(e)}"
-            print(error_msg)
-            if slack_notifier:
-                slack_notifier.send_error_notification(error_msg)
-                
+            traceback.print_exc()
+            clients.notify_error(f"ジョブ実行エラー: {e}")
+        finally:
+            schedule.save()
+
+    scheduler = BlockingScheduler()
+    scheduler.add_job(tick, 'interval', seconds=int(settings.get('tick_seconds', DEFAULT_TICK_SECONDS)),
+                      max_instances=1, coalesce=True, next_run_time=datetime.datetime.now())
+    print('デーモンモードで起動しました（Ctrl+C で終了）')
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        print('デーモンを終了します')
+
+def main():
+    parser = argparse.ArgumentParser(description='ニュース収集')
+    parser.add_argument('--daemon', action='store_true', help='常駐してソースごとの間隔でポーリングする')
+    parser.add_argument('--config', default='config.json', help='設定ファイルのパス')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.daemon:
+        run_daemon(config)
+        return
+    clients = Clients(config)
+    try:
+        job(config, clients)
     except Exception as e:
-        error_msg = f"予期しないエラーが発生しました: {str(e)}"
-        print(error_msg)
         print("詳細エラー情報:")
         traceback.print_exc()
-        
-        # Slack通知を送信
         try:
-            config = load_config()
-            slack_enabled = config.get('slack', {}).get('enabled', False)
-            if slack_enabled:
-                slack_config = config['slack']
-                slack_notifier = SlackNotifier(
-                    token=slack_config['token'],
-                    channel=slack_config['channel']
-                )
-                slack_notifier.send_error_notification(error_msg)
+            clients.notify_error(f"予期しないエラーが発生しました: {e}")
         except Exception as slack_error:
             print(f"Slack通知送信エラー: {slack_error}")
+    print("実行完了")
 
-if __name__ == "__main__":
-    # 一度実行
-    job()
-    print("実行完了")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
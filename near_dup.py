@@ -0,0 +1,161 @@
+"""
+タイトルの類似度による記事の重複検出（文字 n-gram の MinHash と LSH）
+
+同じニュースが複数のソース・カテゴリから少しずつ違うタイトルで届くため、完全一致では
+重複を除けない。タイトルを文字 n-gram の集合にして MinHash の署名を求め、LSH のバケットで
+候補だけを比べるので、全組み合わせを比べずに1件あたりほぼ一定の時間で判定できる。
+文字単位なので日本語も形態素解析なしで扱える。
+"""
+
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import url_canon
+
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_NGRAM = 3
+DEFAULT_NUM_PERM = 64
+# MinHash のハッシュ関数 (a * x + b) mod p の p（a * x が 64 ビットに収まる大きさ）
+MERSENNE_PRIME = (1 << 31) - 1
+SEED = 1
+# 署名を一度に計算するタイトル数（行列は 署名の長さ × この件数分の n-gram）
+SIGNATURE_CHUNK = 1024
+
+
+def _normalize(title: str) -> str:
+    # 全角・半角と大文字・小文字の違い、空白と記号を無視する
+    title = unicodedata.normalize('NFKC', title).lower()
+    return ''.join(ch for ch in title if ch.isalnum())
+
+
+def shingles(title: str, ngram: int = DEFAULT_NGRAM) -> List[int]:
+    """タイトルの文字 n-gram を 32 ビットのハッシュにして返す（n 文字未満ならタイトル全体を1つ）"""
+    text = _normalize(title)
+    if not text:
+        return []
+    if len(text) <= ngram:
+        return [zlib.crc32(text.encode('utf-8'))]
+    return list({zlib.crc32(text[i:i + ngram].encode('utf-8')) for i in range(len(text) - ngram + 1)})
+
+
+def _choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """しきい値付近で候補になる確率が切り替わるよう、バンド数と1バンドの行数を選ぶ"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        # この組み合わせで候補になる確率が 1/2 になる類似度
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, ngram: int = DEFAULT_NGRAM,
+                 num_perm: int = DEFAULT_NUM_PERM):
+        """
+        MinHash/LSH による類似タイトルのインデックス
+
+        Args:
+            threshold (float): 同じ記事とみなす推定 Jaccard 類似度
+            ngram (int): 文字 n-gram の長さ
+            num_perm (int): MinHash の署名の長さ
+        """
+        self.threshold = threshold
+        self.ngram = ngram
+        self.num_perm = num_perm
+        self.bands, self.rows = _choose_bands(threshold, num_perm)
+        rng = np.random.RandomState(SEED)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+
+    def signatures(self, titles: List[str]) -> List[Optional[np.ndarray]]:
+        """タイトルごとの MinHash 署名（比べる文字がないタイトルは None）をまとめて計算する"""
+        result: List[Optional[np.ndarray]] = []
+        # 行列が大きくなりすぎないよう、SIGNATURE_CHUNK 件ずつ計算する（バックフィルで数万件でもメモリが一定）
+        for start in range(0, len(titles), SIGNATURE_CHUNK):
+            result.extend(self._signature_chunk(titles[start:start + SIGNATURE_CHUNK]))
+        return result
+
+    def _signature_chunk(self, titles: List[str]) -> List[Optional[np.ndarray]]:
+        hashed = [shingles(title, self.ngram) for title in titles]
+        lengths = np.array([len(h) for h in hashed])
+        result: List[Optional[np.ndarray]] = [None] * len(titles)
+        if not lengths.sum():
+            return result
+        values = np.fromiter((v for h in hashed for v in h), dtype=np.uint64, count=int(lengths.sum()))
+        values %= np.uint64(MERSENNE_PRIME)
+        # (署名の長さ, チャンク内の全 n-gram) の行列で一度に計算し、記事ごとの最小値を取る
+        permuted = (self._a[:, None] * values[None, :] + self._b[:, None]) % np.uint64(MERSENNE_PRIME)
+        nonempty = np.flatnonzero(lengths)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))[nonempty]
+        minimums = np.minimum.reduceat(permuted, offsets, axis=1).T.copy()
+        for row, index in enumerate(nonempty):
+            result[index] = minimums[row]
+        return result
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, signature: np.ndarray) -> Optional[int]:
+        """登録済みの記事のうち、しきい値以上に似た最も近いもの（なければ None）"""
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        best = None
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, key)
+        return best[1] if best else None
+
+    def add(self, key: int, signature: np.ndarray) -> None:
+        self._signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+
+def collapse(items: List[Dict], settings: Dict = None) -> Tuple[List[Dict], int]:
+    """
+    タイトルが似た記事を1件にまとめる
+
+    先に現れた記事を代表として残し、sources 列にまとめた記事のソース名（重複なし、出現順）を、
+    member_hashes 列にまとめた全記事の url_hash を入れる。
+
+    Args:
+        items (List[Dict]): 記事のリスト
+        settings (Dict): config.json の near_dup セクション（threshold, ngram, num_perm）
+
+    Returns:
+        (まとめた後の記事リスト, まとめて除いた件数)
+    """
+    settings = settings or {}
+    index = NearDuplicateIndex(float(settings.get('threshold', DEFAULT_THRESHOLD)),
+                               int(settings.get('ngram', DEFAULT_NGRAM)),
+                               int(settings.get('num_perm', DEFAULT_NUM_PERM)))
+    signatures = index.signatures([item.get('title', '') for item in items])
+
+    kept: List[Dict] = []
+    for item, signature in zip(items, signatures):
+        representative = index.query(signature) if signature is not None else None
+        if representative is None:
+            # url_canon.dedup で同じリンクの記事のソースを集めてあれば引き継ぐ
+            item['sources'] = list(item.get('sources') or [item.get('source', '')])
+            item['member_hashes'] = [url_canon.item_hash(item)]
+            if signature is not None:
+                index.add(len(kept), signature)
+            kept.append(item)
+            continue
+        canonical = kept[representative]
+        for source in item.get('sources') or [item.get('source', '')]:
+            if source not in canonical['sources']:
+                canonical['sources'].append(source)
+        canonical['member_hashes'].append(url_canon.item_hash(item))
+    return kept, len(items) - len(kept)
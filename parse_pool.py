@@ -0,0 +1,130 @@
+"""
+取得したページの解析（CPU 処理）を複数プロセスで並列に実行するプール
+
+フィード解析・リンク抽出は GIL に縛られるため、取得（I/O）とは別のプロセスで行う。
+ページはバッチにまとめて送り、結果は辞書ではなく (title, link, published) のタプルで返して
+プロセス間通信の量を抑える。
+"""
+
+import atexit
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import run_stats
+import sources
+
+# 1回のプロセス間通信で送るページ数
+DEFAULT_BATCH_SIZE = 8
+
+# 解析ジョブ: (解析用スペック, 本文, Content-Type)
+Job = Tuple[Dict, bytes, Optional[str]]
+
+
+def default_workers() -> int:
+    """既定のワーカー数（1コアならプロセスを使わない）"""
+    cpus = os.cpu_count() or 1
+    return cpus if cpus > 1 else 0
+
+
+def _parse_jobs(jobs: List[Job]) -> List[Tuple[str, object]]:
+    results = []
+    for spec, content, content_type in jobs:
+        try:
+            results.append(('ok', sources.parse_rows(spec, content, content_type)))
+        except Exception as e:
+            results.append(('error', str(e)))
+    return results
+
+
+def parse_batch(jobs: List[Job]) -> Tuple[List[Tuple[str, object]], float, Dict[str, Dict[str, int]], int]:
+    """
+    ワーカープロセスでページをまとめて解析する
+
+    Returns:
+        ジョブごとの ('ok', 行のリスト) または ('error', メッセージ)、
+        このバッチで使った CPU 時間（秒）、ワーカー内で記録したカウンタ、ワーカーのプロセス ID
+    """
+    stats = run_stats.reset()
+    started = time.process_time()
+    results = _parse_jobs(jobs)
+    return results, time.process_time() - started, stats.as_dict()['counters'], os.getpid()
+
+
+def _parse_local(jobs: List[Job]):
+    # 呼び出し元のプロセスで解析する（カウンタは現在の RunStats に直接記録される）
+    started = time.process_time()
+    results = _parse_jobs(jobs)
+    return results, time.process_time() - started, {}, os.getpid()
+
+
+def _warm_up(_) -> int:
+    return os.getpid()
+
+
+class ParsePool:
+    def __init__(self, settings: Dict = None):
+        """
+        解析用プロセスプール
+
+        Args:
+            settings (Dict): config.json の parse セクション
+                workers: ワーカープロセス数（0 なら呼び出し元のプロセスで解析）
+                batch_size: 1回に送るページ数
+        """
+        settings = settings or {}
+        self.workers = int(settings.get('workers', default_workers()))
+        self.batch_size = max(1, int(settings.get('batch_size', DEFAULT_BATCH_SIZE)))
+        self._executor = None
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # 取得スレッドが動き出す前に全ワーカーを起動しておく（fork 時のロック競合を避ける）
+            list(self._executor.map(_warm_up, range(self.workers)))
+
+    def submit(self, jobs: List[Job]) -> Future:
+        """ジョブのバッチを解析に回す（workers が 0 ならこの場で解析して完了済みの Future を返す）"""
+        if self._executor is not None:
+            return self._executor.submit(parse_batch, jobs)
+        future = Future()
+        future.set_result(_parse_local(jobs))
+        return future
+
+    def result(self, future: Future, jobs: List[Job]):
+        """submit() の結果を返す。ワーカーが異常終了していたらこのプロセスで解析し直す"""
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            if self._executor is not None:
+                print('解析プロセスが異常終了したため、以降はこのプロセスで解析します')
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            return _parse_local(jobs)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_pool: Optional[ParsePool] = None
+_pool_settings: Optional[Dict] = None
+
+
+def get_pool(settings: Dict = None) -> ParsePool:
+    """設定に対応するプールを返す（設定が変わらない限り、常駐中もワーカーを使い回す）"""
+    global _pool, _pool_settings
+    settings = dict(settings or {})
+    if _pool is None or settings != _pool_settings:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ParsePool(settings)
+        _pool_settings = settings
+    return _pool
+
+
+@atexit.register
+def _shutdown_pool() -> None:
+    if _pool is not None:
+        _pool.shutdown()
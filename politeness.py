@@ -0,0 +1,143 @@
+"""
+ドメインごとの同時接続数とリクエストレート（トークンバケット）を制御するスケジューラ
+"""
+
+import email.utils
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import run_stats
+
+# ドメインごとの既定値（config.json の politeness セクションで変更可能）
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 4.0   # 1秒あたりのリクエスト数
+DEFAULT_BURST = 8    # 連続して送れるリクエスト数
+# これより長い Retry-After は待たずに諦める
+DEFAULT_MAX_RETRY_AFTER = 30.0
+
+
+class HostDeferredError(Exception):
+    """Retry-After による停止期間が長く、待たずに諦めたことを表す"""
+
+
+class _HostState:
+    def __init__(self, concurrency: int, rate: float, burst: int, max_wait: float):
+        self.semaphore = threading.BoundedSemaphore(max(1, concurrency))
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.not_before = 0.0
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+
+    def take_token(self) -> None:
+        """トークンが得られるまで待つ（Retry-After による停止期間も考慮）"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.not_before:
+                    wait = self.not_before - now
+                    if wait > self.max_wait:
+                        raise HostDeferredError(f"Retry-After により {wait:.0f} 秒間アクセス停止中")
+                elif not self.rate:
+                    return
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PolitenessScheduler:
+    def __init__(self, settings: Dict = None):
+        """
+        ドメイン別の礼儀正しいアクセス制御
+
+        Args:
+            settings (Dict): config.json の politeness セクション
+                default: {"concurrency", "rate", "burst"} の既定値
+                hosts: ホスト名ごとの上書き設定
+                max_retry_after: 待機する Retry-After の上限秒数
+        """
+        settings = settings or {}
+        self.default = {
+            'concurrency': DEFAULT_CONCURRENCY,
+            'rate': DEFAULT_RATE,
+            'burst': DEFAULT_BURST,
+            **settings.get('default', {}),
+        }
+        self.hosts = settings.get('hosts', {})
+        self.max_retry_after = float(settings.get('max_retry_after', DEFAULT_MAX_RETRY_AFTER))
+        self._states: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._states.get(host)
+            if state is None:
+                policy = {**self.default, **self.hosts.get(host, {})}
+                state = _HostState(int(policy['concurrency']), float(policy['rate'] or 0),
+                                   int(policy['burst']), self.max_retry_after)
+                self._states[host] = state
+            return state
+
+    @contextmanager
+    def acquire(self, url: str):
+        """URL のドメインの実行枠とトークンを確保し、待ち時間を記録する"""
+        host = urlparse(url).netloc
+        state = self._state(host)
+        started = time.perf_counter()
+        state.semaphore.acquire()
+        try:
+            state.take_token()
+            run_stats.current.add_time('ドメイン別待ち時間', host, time.perf_counter() - started)
+            run_stats.current.incr('ドメイン別リクエスト数', host)
+            yield
+        finally:
+            state.semaphore.release()
+
+    def defer(self, url: str, retry_after: str) -> Optional[float]:
+        """Retry-After ヘッダーに従ってドメインへの送信を止め、待ち秒数を返す"""
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            return None
+        state = self._state(urlparse(url).netloc)
+        with state.lock:
+            state.not_before = max(state.not_before, time.monotonic() + delay)
+        return delay
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Retry-After（秒数または HTTP 日付）を秒数に変換"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def interleave_by_host(items: List, key: Callable) -> List:
+    """同じホストが連続しないよう、ホストごとのラウンドロビン順に並べ替える"""
+    groups: Dict[str, List] = OrderedDict()
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    queues = [list(reversed(group)) for group in groups.values()]
+    result = []
+    while queues:
+        for queue in queues:
+            result.append(queue.pop())
+        queues = [queue for queue in queues if queue]
+    return result
@@ -0,0 +1,120 @@
+"""
+ソースごとの新着頻度を学習し、ポーリング間隔を調整するスケジュール
+"""
+
+import json
+import os
+import time
+from typing import Dict, Iterable, List
+
+DEFAULT_PATH = 'polling_state.json'
+# 間隔の既定値（秒）
+DEFAULT_MIN_INTERVAL = 180       # 3分
+DEFAULT_MAX_INTERVAL = 6 * 3600  # 6時間
+DEFAULT_INITIAL_INTERVAL = 900   # 15分
+# 1回のポーリングで見込む新着件数（大きいほど間隔が長くなる）
+DEFAULT_TARGET_NEW = 1.0
+# 新着レートの指数移動平均の重み
+DEFAULT_SMOOTHING = 0.3
+# 1回のポーリングで間隔を伸ばす（縮める）ときの最大の倍率
+# （新着のなかった1回だけで max_interval まで飛ばない）
+DEFAULT_MAX_STEP = 2.0
+# 新着判定のためにソースごとに覚えておくリンク数
+MAX_REMEMBERED_LINKS = 500
+
+
+class PollingSchedule:
+    def __init__(self, settings: Dict = None):
+        """
+        適応型ポーリングスケジュール
+
+        Args:
+            settings (Dict): config.json の daemon セクション
+                state_path: 状態の保存先
+                min_interval / max_interval / initial_interval: 間隔の範囲と初期値（秒）
+                target_new: 1回のポーリングで見込む新着件数
+                max_step: 1回のポーリングで間隔を伸ばす（縮める）ときの最大の倍率
+        """
+        settings = settings or {}
+        self.path = settings.get('state_path', DEFAULT_PATH)
+        self.min_interval = float(settings.get('min_interval', DEFAULT_MIN_INTERVAL))
+        self.max_interval = float(settings.get('max_interval', DEFAULT_MAX_INTERVAL))
+        self.initial_interval = float(settings.get('initial_interval', DEFAULT_INITIAL_INTERVAL))
+        self.target_new = float(settings.get('target_new', DEFAULT_TARGET_NEW))
+        self.smoothing = float(settings.get('smoothing', DEFAULT_SMOOTHING))
+        self.max_step = max(1.0, float(settings.get('max_step', DEFAULT_MAX_STEP)))
+        self.sources: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f)
+        except Exception as e:
+            print(f"ポーリング状態の読み込みエラー（初期状態で開始）: {e}")
+            self.sources = {}
+
+    def save(self) -> None:
+        """状態をファイルに保存"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.sources, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def due(self, keys: Iterable[str], now: float = None) -> List[str]:
+        """ポーリング時刻を迎えたソースを返す（未知のソースは即時）"""
+        now = now or time.time()
+        return [key for key in keys if self.sources.get(key, {}).get('next_due', 0) <= now]
+
+    def interval(self, key: str) -> float:
+        """ソースの現在のポーリング間隔（秒）"""
+        return self.sources.get(key, {}).get('interval', self.initial_interval)
+
+    def record(self, key: str, links: List[str], now: float = None) -> int:
+        """
+        ポーリング結果を記録し、新着レートから次回の間隔を更新する
+
+        Returns:
+            int: 前回までに見ていないリンクの件数
+        """
+        now = now or time.time()
+        state = self.sources.get(key)
+        if state is None:
+            # 初回は基準となるリンクを覚えるだけ
+            self.sources[key] = {
+                'interval': self.initial_interval,
+                'rate': None,
+                'last_polled': now,
+                'next_due': now + self.initial_interval,
+                'links': list(dict.fromkeys(links))[:MAX_REMEMBERED_LINKS],
+            }
+            return 0
+
+        if not links:
+            # 取得失敗などで記事がない場合は学習せず、現在の間隔で次回を予約する
+            state['next_due'] = now + state['interval']
+            return 0
+
+        known = set(state['links'])
+        new_links = [link for link in dict.fromkeys(links) if link not in known]
+        elapsed = max(1.0, now - state['last_polled'])
+
+        # 新着レート（件/秒）の指数移動平均から、target_new 件たまる時間を間隔にする
+        observed = len(new_links) / elapsed
+        rate = observed if state['rate'] is None else (
+            self.smoothing * observed + (1 - self.smoothing) * state['rate'])
+        target = self.target_new / rate if rate > 0 else self.max_interval
+        # 1回の観測で変えるのは max_step 倍まで（静かな1回で6時間空けたりしない）
+        interval = min(state['interval'] * self.max_step, max(state['interval'] / self.max_step, target))
+        interval = min(self.max_interval, max(self.min_interval, interval))
+
+        state.update({
+            'interval': interval,
+            'rate': rate,
+            'last_polled': now,
+            'next_due': now + interval,
+            'links': (new_links + state['links'])[:MAX_REMEMBERED_LINKS],
+        })
+        return len(new_links)
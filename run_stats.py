@@ -0,0 +1,78 @@
+"""
+1回の収集処理の実行統計（ソースごとの所要時間・各種カウンタ）を集計する
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict
+
+
+class RunStats:
+    def __init__(self):
+        """
+        実行統計クラス（複数スレッドから安全に記録できる）
+        """
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.timings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record_time(self, section: str, key: str, seconds: float) -> None:
+        """所要時間を記録（同じキーは上書き）"""
+        with self._lock:
+            self.timings[section][key] = seconds
+
+    def add_time(self, section: str, key: str, seconds: float) -> None:
+        """所要時間を加算"""
+        with self._lock:
+            self.timings[section][key] = self.timings[section].get(key, 0.0) + seconds
+
+    def incr(self, section: str, key: str, n: int = 1) -> None:
+        """カウンタを加算"""
+        with self._lock:
+            self.counters[section][key] += n
+
+    def merge_counters(self, counters: Dict[str, Dict[str, int]]) -> None:
+        """別プロセスなどで集計したカウンタを加算"""
+        with self._lock:
+            for section, values in counters.items():
+                for key, n in values.items():
+                    self.counters[section][key] += n
+
+    def elapsed(self) -> float:
+        """計測開始からの経過秒数"""
+        return time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict:
+        """統計を辞書で返す（DataFrame.attrs 等への格納用）"""
+        with self._lock:
+            return {
+                'elapsed': self.elapsed(),
+                'timings': {k: dict(v) for k, v in self.timings.items()},
+                'counters': {k: dict(v) for k, v in self.counters.items()},
+            }
+
+    def report(self, top: int = 15) -> None:
+        """統計を標準出力に表示"""
+        stats = self.as_dict()
+        print(f"\n=== 実行統計 (総所要時間 {stats['elapsed']:.2f}秒) ===")
+        for section, values in stats['timings'].items():
+            print(f"[{section}] 所要時間（上位{top}件）:")
+            for key, seconds in sorted(values.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+                print(f"  {key}: {seconds:.2f}秒")
+        for section, values in stats['counters'].items():
+            print(f"[{section}]")
+            for key, count in sorted(values.items()):
+                print(f"  {key}: {count}")
+
+
+# 現在の収集処理の統計（collect_all の開始時に reset() される）
+current = RunStats()
+
+
+def reset() -> RunStats:
+    """統計を初期化して新しい RunStats を返す"""
+    global current
+    current = RunStats()
+    return current
@@ -0,0 +1,223 @@
+"""
+記事のカテゴリ分類と重要度のスコアリング（Aho-Corasick によるキーワード照合）
+
+カテゴリごとの重み付きキーワード辞書を1つのオートマトン（Aho-Corasick）にまとめ、
+タイトルと要約を1文字ずつ1回なぞるだけで全キーワードを照合する。キーワードの数に
+よらず文の長さに比例した時間で済むので、バックフィルで数万件を扱うときも全件に使える。
+照合結果は記事×カテゴリの行列にし、カテゴリ・重要度・順位は列ごとのベクトル演算で求める。
+
+    category: キーワードの重みの合計が最も大きいカテゴリ（一致がなければ default_category）
+    importance: (キーワードの重みの合計 + 複数ソースで報じられた分の加点) × ソースの重み
+    rank: 重要度の高い順の順位（1 始まり、同点は先に現れた記事が上）
+"""
+
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# カテゴリごとのキーワードと重み（照合の前に NFKC 正規化と小文字化をする）
+DEFAULT_CATEGORIES: Dict[str, Dict[str, float]] = {
+    '金融政策': {
+        '日銀': 3.0, '日本銀行': 3.0, '金融政策': 3.0, '政策金利': 3.0, '利上げ': 3.0, '利下げ': 3.0,
+        '金利': 1.5, 'fed': 3.0, 'fomc': 3.0, 'ecb': 3.0, 'boj': 3.0, 'federal reserve': 3.0,
+        'central bank': 3.0, 'rate hike': 3.0, 'rate cut': 3.0, 'interest rate': 2.0,
+    },
+    'マーケット': {
+        '株価': 2.0, '日経平均': 2.5, '為替': 2.0, '円安': 2.0, '円高': 2.0, '国債': 1.5, '原油': 1.5,
+        '相場': 1.0, 'stocks': 2.0, 'shares': 1.0, 'bond': 1.5, 'yields': 1.5, 'dollar': 1.0,
+        'yen': 1.5, 'oil': 1.0, 's&p 500': 2.0, 'nasdaq': 2.0, 'dow': 1.5, 'wall street': 1.5,
+    },
+    '企業・決算': {
+        '決算': 2.5, '増益': 2.0, '減益': 2.0, '業績': 2.0, '買収': 2.5, '合併': 2.0, '上場': 1.5,
+        'earnings': 2.5, 'profit': 1.5, 'revenue': 1.5, 'acquisition': 2.5, 'merger': 2.5,
+        'ipo': 2.0, 'guidance': 1.5, 'layoffs': 2.0,
+    },
+    '経済指標': {
+        'gdp': 3.0, 'cpi': 3.0, 'インフレ': 2.0, '物価': 2.0, '雇用統計': 3.0, '失業率': 2.5, '景気': 1.5,
+        'inflation': 2.0, 'jobs report': 3.0, 'payrolls': 3.0, 'unemployment': 2.0, 'retail sales': 2.0,
+        'recession': 2.5,
+    },
+    'テクノロジー': {
+        '半導体': 2.5, '人工知能': 2.5, '生成ai': 2.5, 'スタートアップ': 2.0, 'ai': 1.5,
+        'semiconductor': 2.5, 'chip': 1.5, 'startup': 2.0, 'software': 1.0, 'cloud': 1.0,
+    },
+    '政策・規制': {
+        '金融庁': 2.5, '規制': 1.5, '法案': 1.5, '制裁': 2.5, '関税': 2.5, '選挙': 2.0,
+        'regulation': 1.5, 'regulator': 1.5, 'sanctions': 2.5, 'tariff': 2.5, 'tariffs': 2.5,
+        'sec': 1.5, 'election': 2.0,
+    },
+}
+# カテゴリは決めず、重要度だけを上げるキーワード
+DEFAULT_BOOST_KEYWORDS: Dict[str, float] = {
+    '速報': 3.0, '独自': 1.5, '緊急': 2.0, 'breaking': 3.0, 'exclusive': 1.5, 'urgent': 2.0,
+}
+DEFAULT_CATEGORY = 'その他'
+# タイトルでの一致は要約での一致のこの倍で数える
+DEFAULT_TITLE_WEIGHT = 2.0
+# 類似タイトルの統合で1件にまとめたソースが1つ増えるごとの加点
+DEFAULT_COVERAGE_WEIGHT = 1.0
+
+
+def _normalize(text: str) -> str:
+    # 全角・半角と大文字・小文字の違いを無視する
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class KeywordAutomaton:
+    def __init__(self, keywords: Iterable[Tuple[str, int, float]]):
+        """
+        Aho-Corasick のオートマトン
+
+        英数字で始まる（終わる）キーワードは単語の途中では一致させない（'ai' が 'said' に一致しないように）。
+
+        Args:
+            keywords: (キーワード, 列の番号, 重み) の並び
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        # キーワードごとの (長さ, 列の番号, 重み, 前側の単語境界を見るか, 後ろ側の単語境界を見るか)
+        self.patterns: List[Tuple[int, int, float, bool, bool]] = []
+        for keyword, column, weight in keywords:
+            keyword = _normalize(keyword)
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(len(self.patterns))
+            self.patterns.append((len(keyword), column, weight,
+                                  _is_word_char(keyword[0]), _is_word_char(keyword[-1])))
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        # 幅優先で、各状態の「一致に失敗したときに戻る状態」を求め、そこで一致するキーワードも引き継ぐ
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> set:
+        """text（正規化済み）に含まれるキーワードの番号を重複なしで返す"""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        found = set()
+        state = 0
+        end = len(text)
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for pattern in out[state]:
+                length, _, _, check_start, check_end = patterns[pattern]
+                start = position - length + 1
+                if check_start and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_end and position + 1 < end and _is_word_char(text[position + 1]):
+                    continue
+                found.add(pattern)
+        return found
+
+    def score_matrix(self, texts: List[str], columns: int) -> np.ndarray:
+        """文ごと・列ごとに、一致したキーワードの重みの合計を (文の数, 列の数) の行列で返す"""
+        patterns = self.patterns
+        matrix = np.zeros((len(texts), columns))
+        for row, text in enumerate(texts):
+            for pattern in self.find(_normalize(text)):
+                _, column, weight, _, _ = patterns[pattern]
+                matrix[row, column] += weight
+        return matrix
+
+
+class Scorer:
+    def __init__(self, settings: Dict = None):
+        """
+        カテゴリ分類と重要度のスコアリング
+
+        Args:
+            settings (Dict): config.json の scoring セクション
+                categories: カテゴリごとの {キーワード: 重み}（省略時は DEFAULT_CATEGORIES）
+                boost_keywords: カテゴリを決めずに重要度だけを上げる {キーワード: 重み}
+                source_weights: ソース名ごとの重要度の倍率（省略したソースは 1.0）
+                default_category: どのキーワードにも一致しない記事のカテゴリ
+                title_weight: タイトルでの一致を要約での一致の何倍で数えるか
+                coverage_weight: 複数ソースで報じられた記事の、ソース1つあたりの加点
+        """
+        settings = settings or {}
+        categories = settings.get('categories') or DEFAULT_CATEGORIES
+        boost = settings.get('boost_keywords', DEFAULT_BOOST_KEYWORDS)
+        self.categories = list(categories)
+        self.source_weights = {name: float(weight) for name, weight in settings.get('source_weights', {}).items()}
+        self.default_category = settings.get('default_category', DEFAULT_CATEGORY)
+        self.title_weight = float(settings.get('title_weight', DEFAULT_TITLE_WEIGHT))
+        self.coverage_weight = float(settings.get('coverage_weight', DEFAULT_COVERAGE_WEIGHT))
+        # 最後の列は重要度だけに使うキーワード
+        keywords = [(keyword, column, float(weight))
+                    for column, name in enumerate(self.categories)
+                    for keyword, weight in categories[name].items()]
+        keywords += [(keyword, len(self.categories), float(weight)) for keyword, weight in boost.items()]
+        self.automaton = KeywordAutomaton(keywords)
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """df に category・importance・rank 列を加える（df をそのまま書き換えて返す）"""
+        if df.empty:
+            return df
+        columns = len(self.categories) + 1
+        titles = df['title'].fillna('').astype(str).tolist()
+        scores = self.title_weight * self.automaton.score_matrix(titles, columns)
+        if 'summary' in df.columns:
+            summaries = df['summary'].fillna('').astype(str)
+            # 要約されずタイトルのままの記事は、同じ文を二度数えない
+            summaries = summaries.where(summaries != df['title'], '').tolist()
+            scores += self.automaton.score_matrix(summaries, columns)
+
+        category_scores = scores[:, :-1]
+        best = category_scores.argmax(axis=1)
+        categories = np.array(self.categories + [self.default_category], dtype=object)
+        best[category_scores.max(axis=1) <= 0] = len(self.categories)
+        df['category'] = categories[best]
+
+        importance = scores.sum(axis=1)
+        if 'sources' in df.columns:
+            coverage = df['sources'].map(lambda names: len(names) if isinstance(names, (list, np.ndarray)) else 1)
+            importance += self.coverage_weight * (coverage.to_numpy() - 1)
+        importance *= df['source'].map(self.source_weights).fillna(1.0).to_numpy()
+        df['importance'] = np.round(importance, 1)
+        df['rank'] = df['importance'].rank(method='first', ascending=False).astype(int)
+        return df
+
+
+_scorer = None
+_scorer_settings = None
+
+
+def get_scorer(settings: Dict = None) -> Scorer:
+    """設定に対応するスコアラーを返す（設定が変わらない限り、作ったオートマトンを使い回す）"""
+    global _scorer, _scorer_settings
+    settings = dict(settings or {})
+    if _scorer is None or settings != _scorer_settings:
+        _scorer = Scorer(settings)
+        _scorer_settings = settings
+    return _scorer
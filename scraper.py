@@ -1,814 +1,227 @@
 # RSS フィードを取得し、記事情報を抽出する
 
 # scraper.py
-import feedparser
 import pandas as pd
-import datetime
-from typing import List, Dict
-import requests
-from bs4 import BeautifulSoup
-from transformers import pipeline
-
-# 要約パイプラインの初期化（グローバルで一度だけ）
-summarizer = pipeline('summarization', model='sshleifer/distilbart-cnn-12-6')
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict
+from urllib.parse import urlparse
+
+import article_body
+import articles
+import fetcher
+import near_dup
+import parse_pool
+import politeness
+import run_stats
+import scoring
+import seen_store
+import sources
+import summarizer
+import summary_pipeline
+import url_canon
 
 def fetch_feed(feed_url: str, source_name: str) -> List[Dict]:
     """RSS フィードを解析し、記事のリストを返す"""
-    parsed = feedparser.parse(feed_url)
-    items = []
-    for entry in parsed.entries:
-        items.append({
-            'source': source_name,
-            'title': entry.get('title', ''),
-            'link': entry.get('link', ''),
-            'published': entry.get('published', ''),
-            'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-            'summary': ''  # 後で要約を付与
-        })
-    return items
-
-def scrape_fsa_news() -> List[Dict]:
-    """金融庁のウェブサイトからニュースをスクレイピング"""
-    try:
-        print("金融庁のニュースをスクレイピング中...")
-        url = "https://www.fsa.go.jp/news/index.html"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        news_items = []
-        
-        # ニュース一覧を探す
-        news_links = soup.find_all('a', href=True)
-        
-        for link in news_links:
-            href = link.get('href')
-            if href and '/news/' in href and not href.startswith('http'):
-                # 相対URLを絶対URLに変換
-                if href.startswith('/'):
-                    full_url = f"https://www.fsa.go.jp{href}"
-                else:
-                    full_url = f"https://www.fsa.go.jp/{href}"
-                
-                title = link.get_text(strip=True)
-                if title and len(title) > 10:  # 意味のあるタイトルのみ
-                    news_items.append({
-                        'source': '金融庁',
-                        'title': title,
-                        'link': full_url,
-                        'published': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-                    if len(news_items) >= 10:  # 最新10件まで
-                        break
-        
-        print(f"金融庁から {len(news_items)} 件のニュースを取得")
-        return news_items
-        
-    except Exception as e:
-        print(f"金融庁のスクレイピングエラー: {e}")
-        return []
-
-def scrape_nhk_news() -> List[Dict]:
-    """NHKニュースのウェブサイトからニュースをスクレイピング"""
-    try:
-        print("NHKニュースのウェブサイトをスクレイピング中...")
-        urls = [
-            "https://www3.nhk.or.jp/news/",
-            "https://www3.nhk.or.jp/news/easy/",
-            "https://www3.nhk.or.jp/news/special/",
-            "https://www3.nhk.or.jp/news/politics/",
-            "https://www3.nhk.or.jp/news/economy/",
-            "https://www3.nhk.or.jp/news/society/",
-            "https://www3.nhk.or.jp/news/world/",
-            "https://www3.nhk.or.jp/news/science/",
-            "https://www3.nhk.or.jp/news/sports/"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # ニュース記事のリンクを探す
-                news_links = soup.find_all('a', href=True)
-                
-                for link in news_links:
-                    href = link.get('href')
-                    if href and '/news/' in href and not href.startswith('http'):
-                        # 相対URLを絶対URLに変換
-                        if href.startswith('/'):
-                            full_url = f"https://www3.nhk.or.jp{href}"
-                        else:
-                            full_url = f"https://www3.nhk.or.jp/{href}"
-                        
-                        title = link.get_text(strip=True)
-                        if title and len(title) > 10:  # 意味のあるタイトルのみ
-                            all_news_items.append({
-                                'source': 'NHKニュース',
-                                'title': title,
-                                'link': full_url,
-                                'published': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                                'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                            })
-                
-            except Exception as e:
-                print(f"NHK {url} のスクレイピングエラー: {e}")
-                continue
-        
-        # 最新50件まで取得（以前は20件）
-        all_news_items = all_news_items[:50]
-        print(f"NHKニュースから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"NHKニュースのスクレイピングエラー: {e}")
-        return []
-
-def scrape_investing_news() -> List[Dict]:
-    """Investing.comのウェブサイトからニュースをスクレイピング"""
-    try:
-        print("Investing.comのニュースをスクレイピング中...")
-        # 複数のURLを試す
-        urls = [
-            "https://jp.investing.com/news/",
-            "https://jp.investing.com/news/economic-indicators/",
-            "https://jp.investing.com/news/forex-news/"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # ニュース記事のリンクを探す
-                news_links = soup.find_all('a', href=True)
-                
-                for link in news_links:
-                    href = link.get('href')
-                    if href and '/news/' in href and not href.startswith('http'):
-                        # 相対URLを絶対URLに変換
-                        if href.startswith('/'):
-                            full_url = f"https://jp.investing.com{href}"
-                        else:
-                            full_url = f"https://jp.investing.com/{href}"
-                        
-                        title = link.get_text(strip=True)
-                        if title and len(title) > 10:  # 意味のあるタイトルのみ
-                            news_items.append({
-                                'source': 'Investing.com',
-                                'title': title,
-                                'link': full_url,
-                                'published': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                                'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                            })
-                            
-                            if len(news_items) >= 10:  # 最新10件まで
-                                break
-                
-                if news_items:
-                    break  # 成功したらループを抜ける
-                    
-            except Exception as e:
-                print(f"Investing.com {url} のスクレイピングエラー: {e}")
-                continue
-        
-        print(f"Investing.comから {len(news_items)} 件のニュースを取得")
-        return news_items
-        
-    except Exception as e:
-        print(f"Investing.comのスクレイピングエラー: {e}")
-        return []
-
-def scrape_bloomberg_news() -> List[Dict]:
-    """BloombergのRSSフィードからニュースを取得"""
-    try:
-        print("Bloombergのニュースを取得中...")
-        url = "https://feeds.bloomberg.com/markets/news.rss"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # RSSフィードとして解析
-        parsed = feedparser.parse(response.content)
-        news_items = []
-        
-        for entry in parsed.entries[:10]:  # 最新10件
-            news_items.append({
-                'source': 'Bloomberg',
-                'title': entry.get('title', ''),
-                'link': entry.get('link', ''),
-                'published': entry.get('published', ''),
-                'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-            })
-        
-        print(f"Bloombergから {len(news_items)} 件のニュースを取得")
-        return news_items
-        
-    except Exception as e:
-        print(f"Bloombergの取得エラー: {e}")
-        return []
-
-def scrape_wsj_news() -> List[Dict]:
-    """Wall Street JournalのRSSフィードからニュースを取得"""
-    try:
-        print("Wall Street Journalのニュースを取得中...")
-        urls = [
-            "https://feeds.a.dj.com/rss/RSSWorldNews.xml",
-            "https://feeds.a.dj.com/rss/RSSMarketsMain.xml",
-            "https://feeds.a.dj.com/rss/RSSBusinessNews.xml"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'Wall Street Journal',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"WSJ {url} の取得エラー: {e}")
-                continue
-        
-        print(f"Wall Street Journalから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"Wall Street Journalの取得エラー: {e}")
-        return []
+    return sources.run_source(sources.feed_spec({'name': source_name, 'url': feed_url}))
 
-def scrape_bss_news() -> List[Dict]:
-    """BSS（Business Standard）のRSSフィードからニュースを取得"""
+def _run_timed(label: str, func, *args) -> List[Dict]:
+    """取得処理を実行し、ソースごとの所要時間を記録する"""
+    started = time.perf_counter()
     try:
-        print("BSSのニュースを取得中...")
-        urls = [
-            "https://www.business-standard.com/rss/economy-policy-103.rss",
-            "https://www.business-standard.com/rss/markets-102.rss",
-            "https://www.business-standard.com/rss/companies-101.rss",
-            # 代替URL
-            "https://www.business-standard.com/rss/current-news-1.rss",
-            "https://www.business-standard.com/rss/top-stories-1.rss"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Cache-Control': 'no-cache'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'BSS',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"BSS {url} の取得エラー: {e}")
+        return func(*args)
+    finally:
+        run_stats.current.record_time('ソース別所要時間', label, time.perf_counter() - started)
+
+def _fetch_and_parse(specs: List[Dict], pool: parse_pool.ParsePool,
+                     on_source_done: Callable[[str, List[Dict]], None] = None) -> List[List[Dict]]:
+    """
+    取得（I/O ステージ: スレッド）と解析（CPU ステージ: プロセスプール）を重ねて実行し、
+    スペックと同じ順序でソースごとの記事リストを返す
+    """
+    stats = run_stats.current
+    pages: List[List[Dict]] = [[] for _ in specs]
+    remaining = [0] * len(specs)  # ソースごとの解析待ちページ数
+    results: List[List[Dict]] = [[] for _ in specs]
+    batch = []                    # (ソース番号, ページ番号, 解析ジョブ)
+    parsing = {}                  # 解析中の Future -> バッチ
+    timing = {'parse_started': None, 'cpu': 0.0}
+
+    def finish(index: int):
+        items = sources.finish_source(specs[index], [page['items'] for page in pages[index]])
+        results[index] = items
+        if on_source_done is not None:
+            on_source_done(specs[index]['name'], items)
+
+    def flush():
+        if not batch:
+            return
+        if timing['parse_started'] is None:
+            timing['parse_started'] = time.perf_counter()
+        parsing[pool.submit([job for _, _, job in batch])] = list(batch)
+        stats.incr('解析プロセスプール', 'バッチ数')
+        stats.incr('解析プロセスプール', '解析ページ数', len(batch))
+        batch.clear()
+
+    def collect(future):
+        entries = parsing.pop(future)
+        parsed, cpu_seconds, counters, pid = pool.result(future, [job for _, _, job in entries])
+        timing['cpu'] += cpu_seconds
+        # プロセスごとの CPU 時間で、実際に使われたコア数が分かる
+        stats.add_time('解析ワーカー別CPU時間', f'pid {pid}', cpu_seconds)
+        stats.merge_counters(counters)
+        for (index, position, _), (status, value) in zip(entries, parsed):
+            spec = specs[index]
+            page = pages[index][position]
+            if status == 'ok':
+                items = sources.to_items(spec, value, page['fetched_at'])
+                fetcher.store_items(page['url'], page['headers'], items)
+            else:
+                items = sources.parse_failed(spec, page['url'], value)
+            # 本文は解析が済んだら手放す
+            pages[index][position] = {'url': page['url'], 'items': items}
+            remaining[index] -= 1
+            if remaining[index] == 0:
+                finish(index)
+
+    # 全ソースを並列に取得（実際の同時リクエスト数は fetcher 側で制限）
+    # 同じホストのソースが固まらないよう、投入順はホスト単位でラウンドロビンにする
+    with ThreadPoolExecutor(max_workers=max(1, min(len(specs), fetcher.MAX_THREADS))) as executor:
+        fetching = {}
+        for index, spec in politeness.interleave_by_host(
+                list(enumerate(specs)), key=lambda pair: urlparse(pair[1]['urls'][0]).netloc):
+            fetching[executor.submit(_run_timed, spec['name'], sources.fetch_pages, spec)] = index
+        # 取得できたソースから順に解析へ回す
+        for future in as_completed(fetching):
+            index = fetching[future]
+            pages[index] = future.result()
+            unparsed = [position for position, page in enumerate(pages[index]) if 'items' not in page]
+            remaining[index] = len(unparsed)
+            if not unparsed:
+                finish(index)
                 continue
-        
-        print(f"BSSから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"BSSの取得エラー: {e}")
-        return []
-
-def scrape_reuters_news() -> List[Dict]:
-    """ReutersのRSSフィードからニュースを取得（BSSの代替）"""
-    try:
-        print("Reutersのニュースを取得中...")
-        urls = [
-            "https://feeds.reuters.com/reuters/businessNews",
-            "https://feeds.reuters.com/reuters/worldNews",
-            "https://feeds.reuters.com/reuters/marketsNews"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'Reuters',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"Reuters {url} の取得エラー: {e}")
-                continue
-        
-        print(f"Reutersから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"Reutersの取得エラー: {e}")
-        return []
-
-def scrape_cnbc_news() -> List[Dict]:
-    """CNBCのRSSフィードからニュースを取得（Investing.comの代替）"""
-    try:
-        print("CNBCのニュースを取得中...")
-        urls = [
-            "https://www.cnbc.com/id/100003114/device/rss/rss.html",
-            "https://www.cnbc.com/id/10000664/device/rss/rss.html",
-            "https://www.cnbc.com/id/100727362/device/rss/rss.html"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'CNBC',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"CNBC {url} の取得エラー: {e}")
-                continue
-        
-        print(f"CNBCから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"CNBCの取得エラー: {e}")
-        return []
-
-def scrape_financial_times_news() -> List[Dict]:
-    """Financial TimesのRSSフィードからニュースを取得"""
-    try:
-        print("Financial Timesのニュースを取得中...")
-        urls = [
-            "https://www.ft.com/rss/home",
-            "https://www.ft.com/rss/world",
-            "https://www.ft.com/rss/companies"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'Financial Times',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"Financial Times {url} の取得エラー: {e}")
-                continue
-        
-        print(f"Financial Timesから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"Financial Timesの取得エラー: {e}")
-        return []
-
-def scrape_economist_news() -> List[Dict]:
-    """The EconomistのRSSフィードからニュースを取得"""
-    try:
-        print("The Economistのニュースを取得中...")
-        urls = [
-            "https://www.economist.com/finance-and-economics/rss.xml",
-            "https://www.economist.com/business/rss.xml",
-            "https://www.economist.com/international/rss.xml"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'The Economist',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"The Economist {url} の取得エラー: {e}")
-                continue
-        
-        print(f"The Economistから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"The Economistの取得エラー: {e}")
-        return []
-
-def scrape_nikkei_news() -> List[Dict]:
-    """日経新聞のウェブサイトからニュースをスクレイピング"""
+            spec = sources.parse_spec(specs[index])
+            for position in unparsed:
+                page = pages[index][position]
+                batch.append((index, position, (spec, page['content'], page['content_type'])))
+                if len(batch) >= pool.batch_size:
+                    flush()
+            for done in [f for f in parsing if f.done()]:
+                collect(done)
+    io_finished = time.perf_counter()
+    stats.record_time('ステージ', '取得（I/O）', stats.elapsed())
+
+    flush()
+    for future in list(parsing):
+        collect(future)
+    if timing['parse_started'] is not None:
+        # 解析は取得と重なって進むため、取得完了後に残った解析の待ち時間も記録する
+        tail = time.perf_counter() - io_finished
+        stats.record_time('ステージ', '解析（取得完了後の待ち）', tail)
+        stats.record_time('ステージ', '解析（CPU合計）', timing['cpu'])
+        print(f"解析: {pool.workers or 1}プロセス / CPU {timing['cpu']:.2f}秒 / 取得完了後の待ち {tail:.2f}秒")
+    return results
+
+def collect_all(feeds: List[Dict], config: Dict = None, source_specs: List[Dict] = None,
+                on_source_done: Callable[[str, List[Dict]], None] = None) -> pd.DataFrame:
+    """
+    複数のフィードからデータを並列に収集し、DataFrame を返す
+
+    ページの取得はスレッドで、取得したページの解析はプロセスプール（config.json の parse）で行う。
+
+    Args:
+        feeds (List[Dict]): RSSフィード（name, url）の一覧
+        config (Dict): config.json の内容
+        source_specs (List[Dict]): 実行するソーススペック（省略時は sources.load_sources(config)）
+        on_source_done (Callable): ソースの解析が終わるたびに (名前, 記事リスト) で呼ばれるコールバック
+    """
+    config = config or {}
+    url_canon.configure(config.get('url_canon'))
+    if source_specs is None:
+        source_specs = sources.load_sources(config)
+    # ワーカーは取得スレッドを起動する前に用意する
+    pool = parse_pool.get_pool(config.get('parse'))
+    stats = run_stats.reset()
+    stats.incr('解析プロセスプール', 'ワーカー数', pool.workers)
+    fetcher.configure(config.get('fetch'), config.get('http_cache'), config.get('politeness'),
+                      config.get('health'))
+    # 要約モデルは取得と並行してバックグラウンドで読み込んでおく（解析ワーカーの起動後に始める）
+    provider = summarizer.get_summarizer(config.get('summarizer'))
+    loaded_before = provider.loaded
+    provider.preload()
+    store = seen_store.get_store(config.get('seen_store'))
+    body_settings = config.get('article_body', {})
+    # ソースの解析が終わるたびに新着記事の見出しを要約ワーカーに渡し、取得と並行して要約する
+    # （本文を要約する設定では、要約する文が取得完了後まで決まらないため使わない）
+    streaming = config.get('summarizer', {}).get('streaming', {})
+    pipeline = None
+    if provider.enabled and streaming.get('enabled', True) and not body_settings.get('enabled', False):
+        pipeline = summary_pipeline.SummaryPipeline(provider, streaming, store)
+
+    def source_done(name: str, items: List[Dict]):
+        if pipeline is not None:
+            pipeline.submit(items)
+        if on_source_done is not None:
+            on_source_done(name, items)
+
+    # RSSフィードとその他のソースを1つのスペック一覧にまとめる
+    specs = [sources.feed_spec(feed) for feed in feeds] + list(source_specs)
+    # 結果は逐次実行時と同じ順序で結合する
     try:
-        print("日経新聞のニュースをスクレイピング中...")
-        urls = [
-            "https://www.nikkei.com/news/",
-            "https://www.nikkei.com/news/politics/",
-            "https://www.nikkei.com/news/economy/",
-            "https://www.nikkei.com/news/society/",
-            "https://www.nikkei.com/news/world/",
-            "https://www.nikkei.com/news/technology/",
-            "https://www.nikkei.com/news/companies/",
-            "https://www.nikkei.com/news/markets/",
-            "https://www.nikkei.com/news/finance/",
-            "https://www.nikkei.com/news/industry/",
-            "https://www.nikkei.com/news/energy/",
-            "https://www.nikkei.com/news/automotive/",
-            "https://www.nikkei.com/news/electronics/",
-            "https://www.nikkei.com/news/construction/",
-            "https://www.nikkei.com/news/retail/",
-            "https://www.nikkei.com/news/services/",
-            "https://www.nikkei.com/news/it/",
-            "https://www.nikkei.com/news/media/",
-            "https://www.nikkei.com/news/healthcare/",
-            "https://www.nikkei.com/news/food/",
-            "https://www.nikkei.com/news/chemicals/",
-            "https://www.nikkei.com/news/materials/",
-            "https://www.nikkei.com/news/machinery/",
-            "https://www.nikkei.com/news/steel/",
-            "https://www.nikkei.com/news/nonferrous/",
-            "https://www.nikkei.com/news/transportation/",
-            "https://www.nikkei.com/news/information_communications/",
-            "https://www.nikkei.com/news/finance_insurance/",
-            "https://www.nikkei.com/news/real_estate/"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # ニュース記事のリンクを探す
-                news_links = soup.find_all('a', href=True)
-                
-                for link in news_links:
-                    href = link.get('href')
-                    if href and '/news/' in href and not href.startswith('http'):
-                        # 相対URLを絶対URLに変換
-                        if href.startswith('/'):
-                            full_url = f"https://www.nikkei.com{href}"
-                        else:
-                            full_url = f"https://www.nikkei.com/{href}"
-                        
-                        title = link.get_text(strip=True)
-                        if title and len(title) > 10:  # 意味のあるタイトルのみ
-                            all_news_items.append({
-                                'source': '日経新聞',
-                                'title': title,
-                                'link': full_url,
-                                'published': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                                'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                            })
-                
-            except Exception as e:
-                print(f"日経新聞 {url} のスクレイピングエラー: {e}")
-                continue
-        
-        # 最新100件まで取得（以前は16件）
-        all_news_items = all_news_items[:100]
-        print(f"日経新聞から {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"日経新聞のスクレイピングエラー: {e}")
-        return []
-
-def scrape_yahoo_finance_news() -> List[Dict]:
-    """Yahoo FinanceのRSSフィードからニュースを取得"""
-    try:
-        print("Yahoo Financeのニュースを取得中...")
-        urls = [
-            "https://feeds.finance.yahoo.com/rss/2.0/headline",
-            "https://feeds.finance.yahoo.com/rss/2.0/headline?s=^GSPC",
-            "https://feeds.finance.yahoo.com/rss/2.0/headline?s=^DJI"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'Yahoo Finance',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"Yahoo Finance {url} の取得エラー: {e}")
-                continue
-        
-        print(f"Yahoo Financeから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"Yahoo Financeの取得エラー: {e}")
-        return []
-
-def scrape_marketwatch_news() -> List[Dict]:
-    """MarketWatchのRSSフィードからニュースを取得"""
-    try:
-        print("MarketWatchのニュースを取得中...")
-        urls = [
-            "https://feeds.marketwatch.com/marketwatch/topstories/",
-            "https://feeds.marketwatch.com/marketwatch/marketpulse/",
-            "https://feeds.marketwatch.com/marketwatch/realheadlines/"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'MarketWatch',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"MarketWatch {url} の取得エラー: {e}")
-                continue
-        
-        print(f"MarketWatchから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"MarketWatchの取得エラー: {e}")
-        return []
-
-def scrape_techcrunch_news() -> List[Dict]:
-    """TechCrunchのRSSフィードからニュースを取得"""
-    try:
-        print("TechCrunchのニュースを取得中...")
-        urls = [
-            "https://techcrunch.com/feed/",
-            "https://techcrunch.com/category/startups/feed/",
-            "https://techcrunch.com/category/enterprise/feed/"
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        all_news_items = []
-        
-        for url in urls:
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                # RSSフィードとして解析
-                parsed = feedparser.parse(response.content)
-                
-                for entry in parsed.entries[:5]:  # 各フィードから最新5件
-                    all_news_items.append({
-                        'source': 'TechCrunch',
-                        'title': entry.get('title', ''),
-                        'link': entry.get('link', ''),
-                        'published': entry.get('published', ''),
-                        'fetched_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
-                    })
-                    
-            except Exception as e:
-                print(f"TechCrunch {url} の取得エラー: {e}")
-                continue
-        
-        print(f"TechCrunchから {len(all_news_items)} 件のニュースを取得")
-        return all_news_items
-        
-    except Exception as e:
-        print(f"TechCrunchの取得エラー: {e}")
-        return []
-
-def collect_all(feeds: List[Dict]) -> pd.DataFrame:
-    """複数のフィードからデータを収集し、DataFrame を返す"""
-    all_items = []
-    
-    # RSSフィードからデータを収集
-    for feed in feeds:
-        try:
-            items = fetch_feed(feed['url'], feed['name'])
-            all_items.extend(items)
-        except Exception as e:
-            print(f"RSSフィード {feed['name']} の取得エラー: {e}")
-    
-    # ウェブスクレイピングでデータを収集
-    fsa_items = scrape_fsa_news()
-    all_items.extend(fsa_items)
-    
-    nhk_items = scrape_nhk_news()
-    all_items.extend(nhk_items)
-    
-    investing_items = scrape_investing_news()
-    all_items.extend(investing_items)
-    
-    # Bloombergのニュースを追加
-    bloomberg_items = scrape_bloomberg_news()
-    all_items.extend(bloomberg_items)
-    
-    # Wall Street Journalのニュースを追加
-    wsj_items = scrape_wsj_news()
-    all_items.extend(wsj_items)
-    
-    # BSSのニュースを追加
-    bss_items = scrape_bss_news()
-    all_items.extend(bss_items)
-    
-    # Reutersのニュースを追加
-    reuters_items = scrape_reuters_news()
-    all_items.extend(reuters_items)
-
-    # CNBCのニュースを追加
-    cnbc_items = scrape_cnbc_news()
-    all_items.extend(cnbc_items)
-    
-    # Financial Timesのニュースを追加
-    financial_times_items = scrape_financial_times_news()
-    all_items.extend(financial_times_items)
-
-    # The Economistのニュースを追加
-    economist_items = scrape_economist_news()
-    all_items.extend(economist_items)
-
-    # 日経新聞のニュースを追加
-    nikkei_items = scrape_nikkei_news()
-    all_items.extend(nikkei_items)
-
-    # Yahoo Financeのニュースを追加
-    yahoo_finance_items = scrape_yahoo_finance_news()
-    all_items.extend(yahoo_finance_items)
-
-    # MarketWatchのニュースを追加
-    marketwatch_items = scrape_marketwatch_news()
-    all_items.extend(marketwatch_items)
-
-    # TechCrunchのニュースを追加
-    techcrunch_items = scrape_techcrunch_news()
-    all_items.extend(techcrunch_items)
+        all_items = [item for items in _fetch_and_parse(specs, pool, source_done) for item in items]
+    except BaseException:
+        # 要約ワーカーを待機させたまま残さない
+        if pipeline is not None:
+            pipeline.finish()
+        raise
+    fetcher.finish_run()
+    stats.record_time('ステージ', '取得', stats.elapsed())
+    stats.incr('収集', '記事数', len(all_items))
     
-    # 重複を除去（タイトルとリンクの両方で判定）
-    seen = set()
-    unique_items = []
-    for item in all_items:
-        key = (item.get('title', ''), item.get('link', ''))
-        if key not in seen:
-            seen.add(key)
-            unique_items.append(item)
-    df = pd.DataFrame(unique_items)
+    # 重複を除去（正規化したリンクの 64 ビットハッシュで判定）
+    unique_items = url_canon.dedup(all_items)
+    stats.incr('重複除去', 'URL一致', len(all_items) - len(unique_items))
+
+    # 前回までの実行で出力済みの記事を除く（登録は出力が終わってから mark_seen で行う）
+    if store is not None:
+        started = time.perf_counter()
+        unique_items, skipped = store.filter_new(unique_items)
+        stats.record_time('ステージ', '既出記事の照会', time.perf_counter() - started)
+        stats.incr('既出記事', '除外', skipped)
+        stats.incr('既出記事', '新着', len(unique_items))
+
+    # 別ソース・別カテゴリから届いた同じニュース（タイトルが少し違うもの）を1件にまとめる
+    near_dup_settings = config.get('near_dup', {})
+    if near_dup_settings.get('enabled', True):
+        started = time.perf_counter()
+        unique_items, merged = near_dup.collapse(unique_items, near_dup_settings)
+        stats.record_time('ステージ', '類似タイトルの統合', time.perf_counter() - started)
+        stats.incr('重複除去', '類似タイトル', merged)
+    # 記事ごとの辞書を作らず、列ごとに集めて DataFrame にする
+    df = articles.to_frame(unique_items)
     # --- 要約の自動付与 ---
+    started = time.perf_counter()
+    summaries = pipeline.finish() if pipeline is not None else {}
     if not df.empty:
-        def summarize_text(row):
-            text = row['title']
-            try:
-                # 100文字以上なら要約、短い場合はそのまま
-                if len(text) > 100:
-                    summary = summarizer(text, max_length=40, min_length=10, do_sample=False)[0]['summary_text']
-                else:
-                    summary = text
-                return summary
-            except Exception as e:
-                print(f"要約生成エラー: {e}")
-                return text
-        df['summary'] = df.apply(summarize_text, axis=1)
+        texts = df['title'].tolist()
+        # 本文を取得できた記事は、見出しの代わりに本文を要約する（本文は DataFrame には残さない）
+        if body_settings.get('enabled', False):
+            bodies = article_body.fetch_bodies(unique_items, body_settings)
+            texts = [bodies.get(url_canon.item_hash(item)) or title for item, title in zip(unique_items, texts)]
+            started = time.perf_counter()
+        # 取得と並行して要約できなかった文を言語で振り分け、モデルに回すものは長さ順のバッチでまとめて推論する
+        rest = [text for text in dict.fromkeys(texts) if text not in summaries]
+        summaries.update(zip(rest, provider.summarize_many(rest)))
+        df['summary'] = [summaries[text] for text in texts]
+        stats.record_time('ステージ', '要約（取得完了後）', time.perf_counter() - started)
+        if not loaded_before and provider.load_seconds is not None:
+            stats.record_time('ステージ', '要約モデルの読み込み', provider.load_seconds)
+        # タイトルと要約のキーワードでカテゴリ・重要度・順位を付ける（Slack 通知のランキングに使う）
+        scoring_settings = config.get('scoring', {})
+        if scoring_settings.get('enabled', True):
+            started = time.perf_counter()
+            scoring.get_scorer(scoring_settings).score(df)
+            stats.record_time('ステージ', 'スコアリング', time.perf_counter() - started)
+    stats.report()
+    df.attrs['run_stats'] = stats.as_dict()
     return df
\ No newline at end of file
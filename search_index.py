@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+収集した記事（タイトル・要約）の全文検索インデックス（SQLite FTS5）
+
+日本語は形態素解析を使わず、漢字・かなの連続部分を文字バイグラムに分けてから FTS5 に登録する
+（英数字は単語のまま）。検索語も同じように分け、フレーズ検索にするので「日銀」「金融政策」の
+ような語を部分一致で探せる。結果は BM25（タイトルを重く評価）の順に返す。
+
+使い方:
+    python search_index.py 日銀 --days 90
+    python search_index.py "金融政策 植田" --source NHKニュース --since 2025-07-01 --limit 50
+    # アーカイブ（archive/YYYYMM/）からインデックスを作り直す
+    python search_index.py --rebuild
+"""
+
+import argparse
+import datetime
+import email.utils
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import url_canon
+
+DEFAULT_PATH = 'search_index.db'
+# BM25 の列ごとの重み（title, summary）
+TITLE_WEIGHT = 10.0
+SUMMARY_WEIGHT = 1.0
+
+# バイグラムに分ける文字（ひらがな・カタカナ・CJK 統合漢字など）
+_CJK_RUN = re.compile(r'[々〆぀-ヿ㐀-䶿一-鿿豈-﫿]+')
+_WORD_OR_RUN = re.compile(r'[々〆぀-ヿ㐀-䶿一-鿿豈-﫿]+|\w+')
+
+
+def _bigrams(run: str) -> List[str]:
+    if len(run) == 1:
+        return [run]
+    # 末尾の1文字も登録し、1文字の検索語（前方一致）でも見つかるようにする
+    return [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+
+
+def tokenize(text: str) -> str:
+    """インデックスに登録するテキスト（漢字・かなはバイグラム、英数字は単語）"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return _CJK_RUN.sub(lambda match: ' ' + ' '.join(_bigrams(match.group())) + ' ', text)
+
+
+def build_query(query: str) -> str:
+    """
+    検索語を FTS5 の MATCH 式にする（空白区切りの語はすべて含むもの）
+
+    漢字・かなの語はバイグラムのフレーズ（1文字なら前方一致）、英数字の語はその単語にする。
+    """
+    terms = []
+    for word in unicodedata.normalize('NFKC', query).lower().split():
+        for part in _WORD_OR_RUN.findall(word):
+            if _CJK_RUN.fullmatch(part):
+                if len(part) == 1:
+                    terms.append(f'"{part}"*')
+                else:
+                    terms.append('"' + ' '.join(part[i:i + 2] for i in range(len(part) - 1)) + '"')
+            else:
+                terms.append(f'"{part}"')
+    return ' '.join(terms)
+
+
+def _published_at(published: str, fetched_at: str) -> str:
+    """公開日時（RFC 822 / ISO 8601）を UTC の ISO 形式にする（読めなければ取得時刻）"""
+    for value in (published, fetched_at):
+        if not value:
+            continue
+        try:
+            parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                parsed = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return parsed.isoformat(timespec='seconds')
+    return ''
+
+
+class SearchIndex:
+    def __init__(self, path: str = DEFAULT_PATH):
+        """
+        記事の全文検索インデックス
+
+        Args:
+            path (str): SQLite ファイルのパス
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                source TEXT,
+                sources TEXT,
+                title TEXT,
+                link TEXT,
+                summary TEXT,
+                published_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts
+                USING fts5(title, summary, content='', tokenize='unicode61');
+        ''')
+
+    def add(self, df: pd.DataFrame) -> int:
+        """
+        DataFrame の記事を追加し、新しく登録した件数を返す（登録済みの url_hash は読み飛ばす）
+        """
+        if df.empty:
+            return 0
+        rows = []
+        for record in df.to_dict('records'):
+            if isinstance(record.get('url_hash'), float):  # 列を持たない実行分を結合した欠損値
+                del record['url_hash']
+            sources = record.get('sources')
+            if sources is None or isinstance(sources, float):
+                sources = [record.get('source', '')]
+            summary = record.get('summary') or ''
+            if isinstance(summary, float):  # 欠損値（NaN）
+                summary = ''
+            rows.append((
+                int(url_canon.item_hash(record)),
+                record.get('source', ''),
+                '|'.join(sources),
+                record.get('title', ''),
+                record.get('link', ''),
+                summary,
+                _published_at(record.get('published', ''), record.get('fetched_at', '')),
+            ))
+        with self._lock, self._conn:
+            existing = set()
+            ids = [row[0] for row in rows]
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                existing.update(r[0] for r in self._conn.execute(
+                    f'SELECT id FROM articles WHERE id IN ({",".join("?" * len(chunk))})', chunk))
+            new_rows = []
+            for row in rows:
+                if row[0] not in existing:
+                    existing.add(row[0])
+                    new_rows.append(row)
+            self._conn.executemany('INSERT INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)', new_rows)
+            self._conn.executemany('INSERT INTO articles_fts (rowid, title, summary) VALUES (?, ?, ?)',
+                                   [(row[0], tokenize(row[3]), tokenize(row[5])) for row in new_rows])
+        return len(new_rows)
+
+    def search(self, query: str, source: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """
+        記事を検索し、関連度の高い順に返す
+
+        Args:
+            query (str): 検索語（空白区切りの語はすべて含むもの）
+            source (Optional[str]): ソース名（類似記事としてまとめたソースも対象）
+            since / until (Optional[str]): 公開日の範囲（YYYY-MM-DD、until はその日を含む）
+            limit (int): 最大件数
+        """
+        match = build_query(query)
+        if not match:
+            return []
+        sql = ['SELECT a.source, a.sources, a.title, a.link, a.summary, a.published_at,',
+               f' bm25(articles_fts, {TITLE_WEIGHT}, {SUMMARY_WEIGHT}) AS score',
+               ' FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid',
+               ' WHERE articles_fts MATCH ?']
+        params: List = [match]
+        if source:
+            sql.append(" AND instr('|' || a.sources || '|', '|' || ? || '|') > 0")
+            params.append(source)
+        if since:
+            sql.append(' AND a.published_at >= ?')
+            params.append(since)
+        if until:
+            sql.append(' AND a.published_at < ?')
+            params.append((datetime.date.fromisoformat(until) + datetime.timedelta(days=1)).isoformat())
+        sql.append(' ORDER BY score LIMIT ?')
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(''.join(sql), params).fetchall()
+        keys = ('source', 'sources', 'title', 'link', 'summary', 'published_at', 'score')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def rebuild_from_archive(index: SearchIndex, archive_settings: Dict = None) -> int:
+    """アーカイブの全期間の記事をインデックスに登録し、登録した件数を返す"""
+    from archive import ArticleArchive
+
+    archive = ArticleArchive(archive_settings)
+    added = 0
+    for month in archive.months():
+        count = index.add(archive.read([month]))
+        print(f"  {month}: {count}件")
+        added += count
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description='収集した記事の全文検索')
+    parser.add_argument('query', nargs='?', help='検索語（空白区切りの語はすべて含むもの）')
+    parser.add_argument('--source', help='ソース名で絞り込む')
+    parser.add_argument('--since', help='この日以降に公開（YYYY-MM-DD）')
+    parser.add_argument('--until', help='この日まで（YYYY-MM-DD）')
+    parser.add_argument('--days', type=int, help='直近 N 日に公開（--since より優先）')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--rebuild', action='store_true', help='アーカイブからインデックスに登録する')
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args()
+
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+    settings = config.get('search_index', {})
+    index = SearchIndex(settings.get('path', DEFAULT_PATH))
+
+    if args.rebuild:
+        print(f"アーカイブから登録しました: {rebuild_from_archive(index, config.get('archive'))}件")
+        return
+    if not args.query:
+        parser.error('検索語を指定してください')
+
+    since = args.since
+    if args.days is not None:
+        since = (datetime.datetime.utcnow() - datetime.timedelta(days=args.days)).date().isoformat()
+    started = datetime.datetime.now()
+    results = index.search(args.query, source=args.source, since=since, until=args.until, limit=args.limit)
+    elapsed = (datetime.datetime.now() - started).total_seconds() * 1000
+    print(f"{len(results)}件（{len(index)}件中、{elapsed:.1f}ミリ秒）\n")
+    for i, row in enumerate(results, 1):
+        print(f"{i}. [{row['published_at'][:10]}] [{row['source']}] {row['title']}")
+        print(f"   {row['link']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+既出記事の記録（SQLite）。実行をまたいで同じ記事を二度出力しないために使う
+
+記事は正規化したリンクの 64 ビットハッシュ（url_canon.item_hash）を主キーにして、
+初回・最終確認時刻とともに保存する。
+照会と登録はまとめて行い、数千件でも数ミリ秒で済むようにしている。
+前段に月ごとのブルームフィルタ（bloom.BloomHistory）を置き、確実に未出の記事は DB を引かずに通す。
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import run_stats
+import url_canon
+from bloom import BloomHistory
+
+DEFAULT_PATH = 'seen_articles.db'
+# この日数確認されなかった記事は記録から削除する
+DEFAULT_MAX_AGE_DAYS = 180
+# 1回の IN 句に渡すハッシュ数（SQLite の変数上限 999 未満）
+LOOKUP_CHUNK = 900
+
+
+class SeenStore:
+    def __init__(self, path: str = DEFAULT_PATH, max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+                 history: Optional[BloomHistory] = None):
+        """
+        既出記事ストア
+
+        Args:
+            path (str): SQLite ファイルのパス
+            max_age_days (float): この日数確認されなかった記事の記録を削除する
+            history (Optional[BloomHistory]): 照会の前段に置くブルームフィルタ
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        self.history = history
+        # デーモンモードではジョブごとに別スレッドから呼ばれる
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen ('
+            ' url_hash INTEGER PRIMARY KEY,'
+            ' first_seen REAL NOT NULL,'
+            ' last_seen REAL NOT NULL)')
+        self._conn.commit()
+        if history is not None and history.fresh:
+            # ブルームフィルタを新しく作ったときは既存の記録を登録しておく（偽陰性を出さないため）
+            with self._lock:
+                hashes = [row[0] for row in self._conn.execute('SELECT url_hash FROM seen')]
+            history.add(hashes)
+
+    def seen_hashes(self, hashes: Iterable[int]) -> set:
+        """記録済みのハッシュだけを返す"""
+        hashes = list(set(hashes))
+        found = set()
+        with self._lock:
+            for start in range(0, len(hashes), LOOKUP_CHUNK):
+                chunk = hashes[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT url_hash FROM seen WHERE url_hash IN ({placeholders})', chunk)
+                found.update(row[0] for row in rows)
+        return found
+
+    def filter_new(self, items: List[Dict]) -> Tuple[List[Dict], int]:
+        """
+        記録済みの記事を除いたリストと、除いた件数を返す
+
+        記録済みの記事は最終確認時刻を更新する。新しい記事は mark_seen() で登録するまで記録しない
+        （書き込みに失敗した実行の記事を次回もう一度出力するため）。
+        """
+        hashes = [url_canon.item_hash(item) for item in items]
+        candidates = hashes
+        if self.history is not None and hashes:
+            # ブルームフィルタで陰性のものは確実に未出なので DB を引かない
+            maybe = self.history.might_contain(hashes)
+            candidates = [h for h, hit in zip(hashes, maybe) if hit]
+            run_stats.current.incr('ブルームフィルタ', '陰性（照会なし）', len(hashes) - len(candidates))
+            run_stats.current.incr('ブルームフィルタ', '陽性（DBを照会）', len(candidates))
+        seen = self.seen_hashes(candidates) if candidates else set()
+        if self.history is not None:
+            run_stats.current.incr('ブルームフィルタ', '偽陽性', len(set(candidates) - seen))
+        if seen:
+            self._touch(seen, time.time())
+            if self.history is not None:
+                # 出続けている記事は当月のフィルタにも登録し、登録した月が保持期間外になっても陰性にしない
+                self.history.add(seen)
+        new_items = [item for item, h in zip(items, hashes) if h not in seen]
+        return new_items, len(items) - len(new_items)
+
+    def peek_new(self, items: List[Dict]) -> List[Dict]:
+        """記録済みの記事を除いたリストを返す（filter_new と違い、最終確認時刻も統計も更新しない）"""
+        hashes = [url_canon.item_hash(item) for item in items]
+        candidates = hashes
+        if self.history is not None and hashes:
+            candidates = [h for h, hit in zip(hashes, self.history.might_contain(hashes)) if hit]
+        seen = self.seen_hashes(candidates) if candidates else set()
+        return [item for item, h in zip(items, hashes) if h not in seen]
+
+    def _touch(self, hashes: Iterable[int], now: float) -> None:
+        hashes = list(hashes)
+        with self._lock, self._conn:
+            for start in range(0, len(hashes), LOOKUP_CHUNK):
+                chunk = hashes[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                self._conn.execute(f'UPDATE seen SET last_seen = ? WHERE url_hash IN ({placeholders})',
+                                   [now, *chunk])
+
+    def mark_seen(self, hashes: Iterable[int], now: Optional[float] = None) -> None:
+        """記事（url_canon.item_hash のハッシュ）を既出として登録（登録済みなら最終確認時刻だけ更新）"""
+        now = time.time() if now is None else now
+        hashes = [int(h) for h in hashes]
+        rows = [(h, now, now) for h in hashes]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO seen (url_hash, first_seen, last_seen) VALUES (?, ?, ?)'
+                ' ON CONFLICT(url_hash) DO UPDATE SET last_seen = excluded.last_seen', rows)
+        if self.history is not None:
+            self.history.add(hashes)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """max_age_days より長く確認されていない記録を削除し、削除件数を返す"""
+        now = time.time() if now is None else now
+        cutoff = now - self.max_age_days * 86400
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM seen WHERE last_seen < ?', (cutoff,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def emitted_hashes(df) -> List[int]:
+    """
+    出力した DataFrame の記事を既出として登録するハッシュ
+
+    類似タイトルとしてまとめた記事（member_hashes）も含める。まとめられた側を登録しないと、
+    次回の実行で代表の記事だけが既出になり、まとめられた側が新着として出てしまう。
+    """
+    if 'member_hashes' in df.columns:
+        return [h for members in df['member_hashes'] for h in members]
+    return list(df['url_hash'])
+
+
+_store: Optional[SeenStore] = None
+
+
+def get_store(settings: Dict = None) -> Optional[SeenStore]:
+    """
+    config.json の seen_store 設定に対応するストアを返す（無効なら None）
+
+    同じパスのストアは実行をまたいで使い回す。
+    """
+    global _store
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+    path = settings.get('path', DEFAULT_PATH)
+    if _store is None or _store.path != path:
+        if _store is not None:
+            _store.close()
+        max_age_days = float(settings.get('max_age_days', DEFAULT_MAX_AGE_DAYS))
+        history = None
+        bloom_settings = dict(settings.get('bloom', {}))
+        if bloom_settings.get('enabled', True):
+            # 既定では DB の保持期間をカバーする月数だけ保持する
+            bloom_settings.setdefault('months', math.ceil(max_age_days / 30) + 1)
+            history = BloomHistory(bloom_settings)
+        _store = SeenStore(path, max_age_days, history)
+    return _store
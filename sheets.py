@@ -2,22 +2,26 @@ from auth import get_sheets_client
 import pandas as pd
 import datetime
 
-def write_to_sheet(df: pd.DataFrame, config: dict):
+def get_current_sheet_name() -> str:
+    """現在の年月からシート名を生成（例: 202507, 202508）"""
+    return datetime.datetime.now().strftime("%Y%m")
+
+def write_to_sheet(df: pd.DataFrame, config: dict, client=None):
     """DataFrame を指定スプレッドシートに月ごとのシートに蓄積書き込み（ソース、タイトル、リンクのみ）"""
     try:
-        print("Starting Google Sheets authentication...")
-        client = get_sheets_client(
-            config['google_sheets']['client_id'], 
-            config['google_sheets']['client_secret']
-        )
-        print("Authentication successful!")
+        if client is None:
+            print("Starting Google Sheets authentication...")
+            client = get_sheets_client(
+                config['google_sheets']['client_id'], 
+                config['google_sheets']['client_secret']
+            )
+            print("Authentication successful!")
         
         print(f"Opening spreadsheet with ID: {config['google_sheets']['spreadsheet_id']}")
         sh = client.open_by_key(config['google_sheets']['spreadsheet_id'])
         
         # 現在の年月を取得してシート名を生成
-        current_date = datetime.datetime.now()
-        sheet_name = current_date.strftime("%Y%m")  # 例: 202507, 202508
+        sheet_name = get_current_sheet_name()
         
         print(f"Target sheet: {sheet_name}")
         
@@ -42,9 +42,13 @@ class SlackNotifier:
             print(f"Slack通知送信エラー: {e}")
             return False
     
-    def send_news_summary(self, df, total_articles: int, sources: Dict[str, int], sheet_name: str = None) -> bool:
+    def send_news_summary(self, df, total_articles: int, sources: Dict[str, int], sheet_name: str = None,
+                          archive_path: str = None) -> bool:
         """
         ニュース収集完了のサマリーをSlackに送信（リッチ版）
+
+        Args:
+            archive_path (str): 今回の記事を保存したローカルアーカイブのファイル（保存していなければ None）
         """
         try:
             now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -86,7 +90,7 @@ class SlackNotifier:
 📊 総記事数: {total_articles}件
 📈 ソース数: {len(sources)}件
 📋 書き込み先シート: {sheet_name or 'N/A'}
-💾 DB/CSV保存: news.db, news_data.csv
+💾 ローカルアーカイブ: {archive_path or '保存なし'}
 
 📋 *カテゴリ別記事数:*
 {cat_summary if cat_summary else 'N/A'}
@@ -96,7 +100,7 @@ class SlackNotifier:
 
 {'⚠️ *直近エラー:* ' + error_summary if error_count else '✅ エラーなし'}
 
-✅ Google Sheets/DB/CSV保存完了
+✅ {'Google Sheets/アーカイブ' if archive_path else 'Google Sheets'}保存完了
 """
             return self.send_notification(message)
         except Exception as e:
@@ -0,0 +1,396 @@
+"""
+ニュースソースの宣言的な定義（ソーススペック）と、それを実行する共通エンジン
+
+ソースを追加するときは関数を書かず、DEFAULT_SOURCES か config.json の "sources" に
+スペックを1件追加する。取得は全て fetcher（共有セッション・ドメイン別制御・条件付き GET・
+サーキットブレーカー）と feed_parser を通る。
+
+スペックのキー:
+    name: 識別名（実行統計・デーモンのポーリング単位）
+    source: 記事の source 列に入れる名前
+    type: "rss"（RSS/Atom/RDF）または "html"（ページ内のリンクを抽出）
+    urls: 取得する URL の一覧（並列に取得し、結果は URL の順で結合）
+    base_url: html の相対リンクを絶対 URL にする基準
+    link_filter: html で採用するリンクの href に含まれる文字列
+    container: html でリンクを探す要素（"main", "#news", "div.list" など。省略時はページ全体）
+    min_title_length: html で採用するリンクテキストの最小文字数（これより長いもの）
+    per_page_limit: 1ページから取り出す最大件数
+    total_limit: ソース全体の最大件数
+    first_success_only: true なら URL の順で最初に記事が取れたページだけを採用（残りの URL は取得しない）
+    headers: 追加のリクエストヘッダー
+    quiet: true なら進捗を表示しない
+    enabled: false なら実行しない
+"""
+
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+import articles
+import feed_parser
+import fetcher
+import link_extractor
+from articles import Article
+
+DEFAULT_SOURCES: List[Dict] = [
+    {
+        'name': 'fsa_news',
+        'source': '金融庁',
+        'type': 'html',
+        'urls': ['https://www.fsa.go.jp/news/index.html'],
+        'base_url': 'https://www.fsa.go.jp',
+        'link_filter': '/news/',
+        'min_title_length': 10,
+        'per_page_limit': 10,
+    },
+    {
+        'name': 'nhk_news',
+        'source': 'NHKニュース',
+        'type': 'html',
+        'urls': [
+            'https://www3.nhk.or.jp/news/',
+            'https://www3.nhk.or.jp/news/easy/',
+            'https://www3.nhk.or.jp/news/special/',
+            'https://www3.nhk.or.jp/news/politics/',
+            'https://www3.nhk.or.jp/news/economy/',
+            'https://www3.nhk.or.jp/news/society/',
+            'https://www3.nhk.or.jp/news/world/',
+            'https://www3.nhk.or.jp/news/science/',
+            'https://www3.nhk.or.jp/news/sports/',
+        ],
+        'base_url': 'https://www3.nhk.or.jp',
+        'link_filter': '/news/',
+        'min_title_length': 10,
+        'total_limit': 50,
+    },
+    {
+        'name': 'investing_news',
+        'source': 'Investing.com',
+        'type': 'html',
+        'urls': [
+            'https://jp.investing.com/news/',
+            'https://jp.investing.com/news/economic-indicators/',
+            'https://jp.investing.com/news/forex-news/',
+        ],
+        'base_url': 'https://jp.investing.com',
+        'link_filter': '/news/',
+        'min_title_length': 10,
+        'per_page_limit': 10,
+        'first_success_only': True,
+        'headers': {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
+            'Upgrade-Insecure-Requests': '1',
+        },
+    },
+    {
+        'name': 'bloomberg_news',
+        'source': 'Bloomberg',
+        'type': 'rss',
+        'urls': ['https://feeds.bloomberg.com/markets/news.rss'],
+        'per_page_limit': 10,
+    },
+    {
+        'name': 'wsj_news',
+        'source': 'Wall Street Journal',
+        'type': 'rss',
+        'urls': [
+            'https://feeds.a.dj.com/rss/RSSWorldNews.xml',
+            'https://feeds.a.dj.com/rss/RSSMarketsMain.xml',
+            'https://feeds.a.dj.com/rss/RSSBusinessNews.xml',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'bss_news',
+        'source': 'BSS',
+        'type': 'rss',
+        'urls': [
+            'https://www.business-standard.com/rss/economy-policy-103.rss',
+            'https://www.business-standard.com/rss/markets-102.rss',
+            'https://www.business-standard.com/rss/companies-101.rss',
+            # 代替URL
+            'https://www.business-standard.com/rss/current-news-1.rss',
+            'https://www.business-standard.com/rss/top-stories-1.rss',
+        ],
+        'per_page_limit': 5,
+        'headers': {
+            'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Cache-Control': 'no-cache',
+        },
+    },
+    {
+        'name': 'reuters_news',
+        'source': 'Reuters',
+        'type': 'rss',
+        'urls': [
+            'https://feeds.reuters.com/reuters/businessNews',
+            'https://feeds.reuters.com/reuters/worldNews',
+            'https://feeds.reuters.com/reuters/marketsNews',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'cnbc_news',
+        'source': 'CNBC',
+        'type': 'rss',
+        'urls': [
+            'https://www.cnbc.com/id/100003114/device/rss/rss.html',
+            'https://www.cnbc.com/id/10000664/device/rss/rss.html',
+            'https://www.cnbc.com/id/100727362/device/rss/rss.html',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'financial_times_news',
+        'source': 'Financial Times',
+        'type': 'rss',
+        'urls': [
+            'https://www.ft.com/rss/home',
+            'https://www.ft.com/rss/world',
+            'https://www.ft.com/rss/companies',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'economist_news',
+        'source': 'The Economist',
+        'type': 'rss',
+        'urls': [
+            'https://www.economist.com/finance-and-economics/rss.xml',
+            'https://www.economist.com/business/rss.xml',
+            'https://www.economist.com/international/rss.xml',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'nikkei_news',
+        'source': '日経新聞',
+        'type': 'html',
+        'urls': [
+            f'https://www.nikkei.com/news/{category}' for category in (
+                '', 'politics/', 'economy/', 'society/', 'world/', 'technology/', 'companies/',
+                'markets/', 'finance/', 'industry/', 'energy/', 'automotive/', 'electronics/',
+                'construction/', 'retail/', 'services/', 'it/', 'media/', 'healthcare/', 'food/',
+                'chemicals/', 'materials/', 'machinery/', 'steel/', 'nonferrous/', 'transportation/',
+                'information_communications/', 'finance_insurance/', 'real_estate/',
+            )
+        ],
+        'base_url': 'https://www.nikkei.com',
+        'link_filter': '/news/',
+        'min_title_length': 10,
+        'total_limit': 100,
+    },
+    {
+        'name': 'yahoo_finance_news',
+        'source': 'Yahoo Finance',
+        'type': 'rss',
+        'urls': [
+            'https://feeds.finance.yahoo.com/rss/2.0/headline',
+            'https://feeds.finance.yahoo.com/rss/2.0/headline?s=^GSPC',
+            'https://feeds.finance.yahoo.com/rss/2.0/headline?s=^DJI',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'marketwatch_news',
+        'source': 'MarketWatch',
+        'type': 'rss',
+        'urls': [
+            'https://feeds.marketwatch.com/marketwatch/topstories/',
+            'https://feeds.marketwatch.com/marketwatch/marketpulse/',
+            'https://feeds.marketwatch.com/marketwatch/realheadlines/',
+        ],
+        'per_page_limit': 5,
+    },
+    {
+        'name': 'techcrunch_news',
+        'source': 'TechCrunch',
+        'type': 'rss',
+        'urls': [
+            'https://techcrunch.com/feed/',
+            'https://techcrunch.com/category/startups/feed/',
+            'https://techcrunch.com/category/enterprise/feed/',
+        ],
+        'per_page_limit': 5,
+    },
+]
+
+
+def feed_spec(feed: Dict) -> Dict:
+    """config.json の rss_feeds の1件（name, url）をソーススペックに変換"""
+    return {
+        'name': feed['name'],
+        'source': feed['name'],
+        'type': 'rss',
+        'urls': [feed['url']],
+        'quiet': True,
+    }
+
+
+def load_sources(config: Dict = None) -> List[Dict]:
+    """
+    既定のソースに config.json の "sources" を重ねたスペック一覧を返す
+
+    同じ name のスペックは config 側で上書きし、"enabled": false のものは除外する。
+    """
+    config = config or {}
+    specs = {spec['name']: spec for spec in DEFAULT_SOURCES}
+    for spec in config.get('sources', []):
+        specs[spec['name']] = {**specs.get(spec['name'], {}), **spec}
+    return [spec for spec in specs.values() if spec.get('enabled', True)]
+
+
+def get_source(name: str, config: Dict = None) -> Dict:
+    """名前でソーススペックを取得"""
+    for spec in load_sources(config):
+        if spec['name'] == name:
+            return spec
+    raise KeyError(name)
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+# 解析結果の1件（title, link, published）。プロセス間で受け渡すため辞書ではなくタプルにする
+Row = Tuple[str, str, str]
+
+# 解析に必要なスペックのキー（解析ワーカーにはこれだけを渡す）
+PARSE_KEYS = ('type', 'base_url', 'link_filter', 'min_title_length', 'per_page_limit', 'container')
+
+
+def _parse_rss(spec: Dict, content: bytes, content_type: Optional[str] = None) -> List[Row]:
+    return [(entry.get('title', ''), entry.get('link', ''), entry.get('published', ''))
+            for entry in feed_parser.parse_entries(content, limit=spec.get('per_page_limit'))]
+
+
+def _parse_html(spec: Dict, content: bytes, content_type: Optional[str] = None) -> List[Row]:
+    base_url = spec['base_url']
+    link_filter = spec.get('link_filter', '')
+    min_title_length = spec.get('min_title_length', 0)
+    limit = spec.get('per_page_limit')
+
+    rows = []
+    # ページに公開日時がないため取得時刻を使う（ページ内の全件で同じ値）
+    now = _now()
+    # ニュース記事のリンクを探す
+    for href, title in link_extractor.extract_links(content, content_type, spec.get('container')):
+        if link_filter in href and not href.startswith('http'):
+            # 相対URLを絶対URLに変換
+            if href.startswith('/'):
+                full_url = f"{base_url}{href}"
+            else:
+                full_url = f"{base_url}/{href}"
+
+            if title and len(title) > min_title_length:  # 意味のあるタイトルのみ
+                rows.append((title, full_url, now))
+                if limit is not None and len(rows) >= limit:
+                    break
+    return rows
+
+
+PARSERS = {
+    'rss': _parse_rss,
+    'html': _parse_html,
+}
+
+
+def parse_spec(spec: Dict) -> Dict:
+    """解析に必要なキーだけを取り出したスペック"""
+    return {key: spec[key] for key in PARSE_KEYS if key in spec}
+
+
+def parse_rows(spec: Dict, content: bytes, content_type: Optional[str] = None) -> List[Row]:
+    """取得したページをスペックの type に応じて解析し、(title, link, published) のリストを返す"""
+    return PARSERS[spec['type']](spec, content, content_type)
+
+
+def to_items(spec: Dict, rows: List[Row], fetched_at: Optional[str] = None) -> List[Article]:
+    """解析結果のタプルを記事にする（fetched_at はページの取得時刻、省略時は現在時刻）"""
+    return articles.from_rows(spec['source'], rows, fetched_at or _now())
+
+
+def parse_page(spec: Dict, content: bytes, content_type: Optional[str] = None,
+               fetched_at: Optional[str] = None) -> List[Article]:
+    """取得したページをスペックの type に応じて解析し、記事のリストを返す"""
+    return to_items(spec, parse_rows(spec, content, content_type), fetched_at)
+
+
+def fetch_pages(spec: Dict) -> List[Dict]:
+    """
+    スペックの URL を並列に取得する（解析はしない）
+
+    first_success_only のスペックは URL の順に1つずつ取得し、記事が取れたページで止める
+    （記事があるかは解析しないと分からないため、そのページはここで解析する）。
+
+    Returns:
+        List[Dict]: URL の順のページ。304 で再利用した記事や取得エラー（空リスト）は
+            {'url', 'items'}、解析が必要なものは {'url', 'content', 'content_type', 'headers', 'fetched_at'}
+    """
+    quiet = spec.get('quiet', False)
+    if not quiet:
+        print(f"{spec['source']}のニュースを取得中...")
+
+    def fetch_page(url: str) -> Dict:
+        try:
+            items, response = fetcher.fetch_page(url, headers=spec.get('headers'))
+        except Exception as e:
+            print(f"{spec['source']} {url} の取得エラー: {e}")
+            return {'url': url, 'items': []}
+        if items is not None:
+            return {'url': url, 'items': items}
+        return {'url': url, 'content': response.content,
+                'content_type': response.headers.get('Content-Type'), 'headers': response.headers,
+                'fetched_at': _now()}
+
+    if not spec.get('first_success_only'):
+        return fetcher.map_ordered(fetch_page, spec['urls'])
+    # 同じホストに余分なリクエストを送らないよう、最初に記事が取れたページで止める
+    pages = []
+    for url in spec['urls']:
+        page = fetch_page(url)
+        page = {'url': url, 'items': _parse_fetched(spec, page)}
+        pages.append(page)
+        if page['items']:
+            break
+    return pages
+
+
+def _parse_fetched(spec: Dict, page: Dict) -> List[Article]:
+    """fetch_pages のページを（必要なら解析して）記事のリストにする"""
+    if 'items' in page:
+        return page['items']
+    try:
+        items = parse_page(spec, page['content'], page['content_type'], page['fetched_at'])
+    except Exception as e:
+        return parse_failed(spec, page['url'], e)
+    fetcher.store_items(page['url'], page['headers'], items)
+    return items
+
+
+def parse_failed(spec: Dict, url: str, error: Exception) -> List[Article]:
+    """解析エラーを表示し、そのページを空として扱う"""
+    print(f"{spec['source']} {url} の取得エラー: {error}")
+    return []
+
+
+def finish_source(spec: Dict, pages: List[List[Article]]) -> List[Article]:
+    """URL の順に並んだページごとの記事を、スペックの件数制限に従って1つのリストにまとめる"""
+    if spec.get('first_success_only'):
+        # URL の順で最初に取得できたページを採用する
+        items = next((page for page in pages if page), [])
+    else:
+        items = [item for page in pages for item in page]
+    if spec.get('total_limit') is not None:
+        items = items[:spec['total_limit']]
+
+    if not spec.get('quiet', False):
+        print(f"{spec['source']}から {len(items)} 件のニュースを取得")
+    return items
+
+
+def run_source(spec: Dict) -> List[Article]:
+    """ソーススペックを実行し（取得と解析をこのプロセスで行う）、記事のリストを返す"""
+    pages = [_parse_fetched(spec, page) for page in fetch_pages(spec)]
+    return finish_source(spec, pages)
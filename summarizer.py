@@ -0,0 +1,295 @@
+"""
+記事の要約（transformers の summarization パイプライン）を必要になったときに読み込むプロバイダー
+
+transformers・torch の import とモデルの読み込みには数秒と数百 MB かかるため、モジュールの
+import 時には何もしない。最初に要約するとき（または preload() を呼んだとき）に一度だけ読み込み、
+以降の実行では使い回す。config.json の summarizer.enabled を false にすると読み込まず、
+タイトルをそのまま要約として使う。
+要約した結果は summary_cache に保存し、同じ文（同じモデル・設定）は推論せずに返す。
+
+推論のバックエンドは summarizer.backend で選ぶ（同じモデルを CPU で速く動かすため）。
+    pytorch: そのままの PyTorch（float32）
+    quantized: Linear 層を int8 に動的量子化した PyTorch（追加の依存なし）
+    onnx: ONNX Runtime（optimum[onnxruntime] が必要。初回にエクスポートして onnx_dir に保存）
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import lang_route
+import run_stats
+import summary_cache
+
+DEFAULT_MODEL = 'sshleifer/distilbart-cnn-12-6'
+# この文字数より長いタイトルだけを要約する（短いものはそのまま）
+DEFAULT_MIN_TEXT_LENGTH = 100
+DEFAULT_MAX_LENGTH = 40
+DEFAULT_MIN_LENGTH = 10
+# 1回の推論にまとめる文の数
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_BACKEND = 'pytorch'
+# ONNX にエクスポートしたモデルの保存先
+DEFAULT_ONNX_DIR = 'onnx_models'
+# モデルの1件あたりの推論時間（秒）の見積もり。実測値がまだないときに、振り分けで省いた時間の計算に使う
+DEFAULT_SECONDS_PER_ITEM = 0.5
+
+
+def _load_pytorch(model: str, settings: Dict):
+    from transformers import pipeline
+    return pipeline('summarization', model=model)
+
+
+def _load_quantized(model: str, settings: Dict):
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+    base = AutoModelForSeq2SeqLM.from_pretrained(model)
+    # 重みを int8 にし、活性は推論時に量子化する（CPU の行列積が速くなりメモリも減る）
+    quantized = torch.quantization.quantize_dynamic(base, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline('summarization', model=quantized, tokenizer=AutoTokenizer.from_pretrained(model))
+
+
+def _load_onnx(model: str, settings: Dict):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer, pipeline
+    path = os.path.join(settings.get('onnx_dir', DEFAULT_ONNX_DIR), model.replace('/', '--'))
+    if os.path.isdir(path):
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(path)
+        tokenizer = AutoTokenizer.from_pretrained(path)
+    else:
+        print(f"要約モデルを ONNX にエクスポートしています: {path}")
+        ort_model = ORTModelForSeq2SeqLM.from_pretrained(model, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        ort_model.save_pretrained(path)
+        tokenizer.save_pretrained(path)
+    return pipeline('summarization', model=ort_model, tokenizer=tokenizer)
+
+
+BACKENDS: Dict[str, Callable] = {
+    'pytorch': _load_pytorch,
+    'quantized': _load_quantized,
+    'onnx': _load_onnx,
+}
+
+
+class Summarizer:
+    def __init__(self, settings: Dict = None):
+        """
+        要約モデルの遅延読み込みプロバイダー
+
+        Args:
+            settings (Dict): config.json の summarizer セクション
+                enabled: false なら要約しない（モデルを読み込まない）
+                model: transformers のモデル名
+                backend: 推論のバックエンド（pytorch / quantized / onnx）
+                onnx_dir: onnx で使うエクスポート済みモデルの保存先
+                preload: true なら取得中にバックグラウンドで読み込んでおく
+                min_text_length: この文字数より長い文だけ要約する
+                max_length / min_length: 要約の長さ（トークン数）
+                batch_size: 1回の推論にまとめる文の数
+                torch_threads: torch の演算に使うスレッド数（省略時は torch の既定）
+                seconds_per_item: 実測値がないときの、モデルの1件あたりの推論時間の見積もり（秒）
+                cache: 要約キャッシュの設定（enabled, path, max_entries, max_age_days）
+                routing: 言語ごとの振り分けの設定（enabled と lang_route.Router の設定）
+        """
+        settings = settings or {}
+        self.enabled = bool(settings.get('enabled', True))
+        self.model = settings.get('model', DEFAULT_MODEL)
+        self.backend = settings.get('backend', DEFAULT_BACKEND)
+        if self.backend not in BACKENDS:
+            print(f"不明な要約バックエンド {self.backend!r} のため {DEFAULT_BACKEND} を使います")
+            self.backend = DEFAULT_BACKEND
+        self._settings = settings
+        self.preload_enabled = bool(settings.get('preload', True))
+        self.min_text_length = int(settings.get('min_text_length', DEFAULT_MIN_TEXT_LENGTH))
+        self.max_length = int(settings.get('max_length', DEFAULT_MAX_LENGTH))
+        self.min_length = int(settings.get('min_length', DEFAULT_MIN_LENGTH))
+        self.batch_size = max(1, int(settings.get('batch_size', DEFAULT_BATCH_SIZE)))
+        self.torch_threads = int(settings['torch_threads']) if settings.get('torch_threads') else None
+        self.cache = summary_cache.get_cache(settings.get('cache')) if self.enabled else None
+        routing = settings.get('routing', {})
+        self.router = lang_route.Router(routing) if routing.get('enabled', True) else None
+        # モデルで1件要約するのにかかった平均秒数（振り分けで省いた推論時間の見積もりに使う）
+        self.seconds_per_item: Optional[float] = None
+        self.default_seconds_per_item = float(settings.get('seconds_per_item', DEFAULT_SECONDS_PER_ITEM))
+        self._lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+        self._pipeline = None
+        self._error: Optional[Exception] = None
+        self._loader: Optional[threading.Thread] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipeline is not None
+
+    def load(self):
+        """パイプラインを返す（初回だけ読み込む。読み込みに失敗したら None）"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._pipeline is None and self._error is None:
+                started = time.perf_counter()
+                self._set_torch_threads()
+                try:
+                    self._pipeline = BACKENDS[self.backend](self.model, self._settings)
+                except Exception as e:
+                    if self.backend != DEFAULT_BACKEND:
+                        print(f"要約バックエンド {self.backend} の読み込みエラー（{DEFAULT_BACKEND} で続行）: {e}")
+                        self.backend = DEFAULT_BACKEND
+                        try:
+                            self._pipeline = BACKENDS[DEFAULT_BACKEND](self.model, self._settings)
+                        except Exception as e2:
+                            e = e2
+                    if self._pipeline is None:
+                        # 失敗を覚えておき、毎回読み込み直さない（要約なしで続行）
+                        self._error = e
+                        print(f"要約モデルの読み込みエラー（要約なしで続行）: {e}")
+                self.load_seconds = time.perf_counter() - started
+            return self._pipeline
+
+    def _set_torch_threads(self) -> None:
+        # 取得・解析・要約ワーカーと CPU を分け合うため、演算のスレッド数を絞れるようにする
+        if self.torch_threads is None:
+            return
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(self.torch_threads)
+
+    def preload(self) -> None:
+        """バックグラウンドのスレッドで読み込みを始める（無効・読み込み済みなら何もしない）"""
+        if not self.enabled or not self.preload_enabled or self.loaded or self._loader is not None:
+            return
+        self._loader = threading.Thread(target=self.load, name='summarizer-preload', daemon=True)
+        self._loader.start()
+
+    @property
+    def cache_namespace(self) -> str:
+        """キャッシュのキーに含めるモデルとパラメータ（変えると以前の要約は使われない）"""
+        return f'{self.model}|{self.backend}|max_length={self.max_length}|min_length={self.min_length}'
+
+    def estimated_seconds_per_item(self) -> float:
+        """モデルの1件あたりの推論時間（この実行の実測、なければ前回までの実測、それもなければ設定値）"""
+        if self.seconds_per_item is not None:
+            return self.seconds_per_item
+        if self.cache is not None:
+            saved = self.cache.get_meta(f'seconds_per_item|{self.cache_namespace}')
+            if saved is not None:
+                return saved
+        return self.default_seconds_per_item
+
+    def needs_summary(self, text: str) -> bool:
+        return self.enabled and len(text) > self.min_text_length
+
+    def _generate(self, summarizer, texts: List[str]) -> List[str]:
+        # transformers のパイプラインはスレッドセーフではないため、推論は一度に1つだけ行う
+        # （要約ワーカーが複数でも、重なるのは振り分け・キャッシュの照会などモデル以外の処理）
+        with self._inference_lock:
+            outputs = summarizer(texts, max_length=self.max_length, min_length=self.min_length,
+                                 do_sample=False, truncation=True, batch_size=len(texts))
+        return [output['summary_text'] for output in outputs]
+
+    def _route(self, texts: List[str], pending: List[int], results: List[str]) -> List[int]:
+        """言語ごとに振り分け、モデルで要約するものだけを返す（抽出・スキップはこの場で済ませる）"""
+        stats = run_stats.current
+        to_model = []
+        for i in pending:
+            language, route = self.router.route(texts[i])
+            stats.incr('要約の振り分け', f'{language} → {route}')
+            if route == lang_route.MODEL:
+                to_model.append(i)
+            elif route == lang_route.EXTRACT:
+                results[i] = self.router.extract(texts[i])
+        return to_model
+
+    def summarize_many(self, texts: List[str]) -> List[str]:
+        """
+        複数の文をまとめて要約し、入力と同じ順で返す（短い文・無効時・エラー時は元の文）
+
+        要約が必要な文を言語で振り分け（日本語は抽出型、英語はモデル）、モデルに回す文のうち
+        キャッシュにないものだけを長さ順に並べて batch_size 件ずつ推論する。
+        長さの近い文を同じバッチにするとパディングが減り、1件ずつ推論するより CPU でも大幅に速い。
+        """
+        results = list(texts)
+        pending = [i for i, text in enumerate(texts) if self.needs_summary(text)]
+        routed = len(pending)
+        if pending and self.router is not None:
+            pending = self._route(texts, pending, results)
+        self._summarize_with_model(texts, pending, results)
+        avoided = routed - len(pending)
+        if avoided:
+            # モデルの1件あたりの推論時間（実測、なければ前回の実測か設定値）から、振り分けで省いた時間を見積もる
+            run_stats.current.incr('要約の振り分け', 'モデルを省いた件数', avoided)
+            run_stats.current.add_time('ステージ', '要約（振り分けで省いた推論の見積もり）',
+                                       avoided * self.estimated_seconds_per_item())
+        return results
+
+    def _summarize_with_model(self, texts: List[str], pending: List[int], results: List[str]) -> None:
+        """pending の文をキャッシュかモデルで要約し、results に書き込む"""
+        keys = {}
+        if pending and self.cache is not None:
+            keys = {i: summary_cache.cache_key(self.cache_namespace, texts[i]) for i in pending}
+            cached = self.cache.get_many(keys.values())
+            for i in pending:
+                if keys[i] in cached:
+                    results[i] = cached[keys[i]]
+            pending = [i for i in pending if keys[i] not in cached]
+            run_stats.current.incr('要約キャッシュ', 'ヒット', len(keys) - len(pending))
+            run_stats.current.incr('要約キャッシュ', 'ミス', len(pending))
+        if not pending:
+            return
+        summarizer = self.load()
+        if summarizer is None:
+            return
+        pending.sort(key=lambda i: len(texts[i]))
+        failed = set()
+        started = time.perf_counter()
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                summaries = self._generate(summarizer, [texts[i] for i in batch])
+            except Exception as e:
+                print(f"要約生成エラー（{len(batch)}件、1件ずつやり直します）: {e}")
+                summaries = []
+                for i in batch:
+                    try:
+                        summaries.extend(self._generate(summarizer, [texts[i]]))
+                    except Exception as e:
+                        print(f"要約生成エラー: {e}")
+                        summaries.append(texts[i])
+                        failed.add(i)
+            for i, summary in zip(batch, summaries):
+                results[i] = summary
+        elapsed = time.perf_counter() - started
+        self.seconds_per_item = elapsed / len(pending)
+        if self.cache is not None:
+            # 次回以降、モデルを使わない実行でも見積もりに使えるよう保存しておく
+            self.cache.set_meta(f'seconds_per_item|{self.cache_namespace}', self.seconds_per_item)
+        run_stats.current.incr('要約', 'モデルで要約', len(pending))
+        run_stats.current.incr('要約', 'バッチ数', -(-len(pending) // self.batch_size))
+        run_stats.current.add_time('ステージ', '要約（モデルの推論）', elapsed)
+        if self.cache is not None:
+            # 失敗して元の文を返したものは次回もう一度要約する
+            # （読み込みでバックエンドが切り替わった場合に備え、キーは実際のバックエンドで作り直す）
+            namespace = self.cache_namespace
+            self.cache.put_many([(summary_cache.cache_key(namespace, texts[i]), results[i])
+                                 for i in pending if i not in failed])
+            evicted = self.cache.evict()
+            run_stats.current.incr('要約キャッシュ', '削除', evicted)
+
+
+_summarizer: Optional[Summarizer] = None
+_summarizer_settings: Optional[Dict] = None
+
+
+def get_summarizer(settings: Dict = None) -> Summarizer:
+    """設定に対応するプロバイダーを返す（設定が変わらない限り、読み込んだモデルを使い回す）"""
+    global _summarizer, _summarizer_settings
+    settings = dict(settings or {})
+    if _summarizer is None or settings != _summarizer_settings:
+        _summarizer = Summarizer(settings)
+        _summarizer_settings = settings
+    return _summarizer
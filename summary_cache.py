@@ -0,0 +1,129 @@
+"""
+要約結果のキャッシュ（SQLite）。同じタイトルを実行のたびに要約し直さないために使う
+
+キーはモデル名・要約のパラメータ・本文から求めた 64 ビットハッシュで、モデルや設定を
+変えると別のキーになる。照会と登録はまとめて行い、最後に使われた時刻が古いものから削除する
+（件数の上限と保持日数の両方で削除する LRU）。
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import url_canon
+
+DEFAULT_PATH = 'summary_cache.db'
+DEFAULT_MAX_ENTRIES = 50_000
+# この日数使われなかった要約は削除する
+DEFAULT_MAX_AGE_DAYS = 30
+# 1回の IN 句に渡すキー数（SQLite の変数上限 999 未満）
+LOOKUP_CHUNK = 900
+
+
+def cache_key(namespace: str, text: str) -> int:
+    """モデルとパラメータ（namespace）と本文のハッシュ"""
+    return url_canon.hash_text(f'{namespace}\0{text}')
+
+
+class SummaryCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        """
+        要約キャッシュ
+
+        Args:
+            path (str): SQLite ファイルのパス
+            max_entries (int): 保持する要約の最大件数
+            max_age_days (float): この日数使われなかった要約を削除する
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS summaries (
+                key INTEGER PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+        ''')
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[int], now: Optional[float] = None) -> Dict[int, str]:
+        """キャッシュにある要約を {キー: 要約} で返し、それらの最終使用時刻を更新する"""
+        now = time.time() if now is None else now
+        keys = list(set(keys))
+        found = {}
+        with self._lock, self._conn:
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._conn.execute(
+                    f'SELECT key, summary FROM summaries WHERE key IN ({placeholders})', chunk))
+            hits = list(found)
+            for start in range(0, len(hits), LOOKUP_CHUNK):
+                chunk = hits[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                self._conn.execute(f'UPDATE summaries SET last_used = ? WHERE key IN ({placeholders})',
+                                   [now, *chunk])
+        return found
+
+    def put_many(self, entries: List[Tuple[int, str]], now: Optional[float] = None) -> None:
+        """要約を (キー, 要約) のリストでまとめて登録する"""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO summaries (key, summary, created, last_used) VALUES (?, ?, ?, ?)'
+                ' ON CONFLICT(key) DO UPDATE SET summary = excluded.summary, last_used = excluded.last_used',
+                [(key, summary, now, now) for key, summary in entries])
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """保持日数を過ぎたものと、件数の上限を超えた分（最終使用が古い順）を削除し、削除件数を返す"""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            removed = self._conn.execute('DELETE FROM summaries WHERE last_used < ?',
+                                         (now - self.max_age_days * 86400,)).rowcount
+            excess = self._conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += self._conn.execute(
+                    'DELETE FROM summaries WHERE key IN'
+                    ' (SELECT key FROM summaries ORDER BY last_used LIMIT ?)', (excess,)).rowcount
+        return removed
+
+    def get_meta(self, name: str) -> Optional[float]:
+        """実行をまたいで保存した数値（モデルの1件あたりの推論時間など）を返す（なければ None）"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_cache(settings: Dict = None) -> Optional[SummaryCache]:
+    """config.json の summarizer.cache 設定に対応するキャッシュを返す（無効なら None）"""
+    settings = settings or {}
+    if not settings.get('enabled', True):
+        return None
+    return SummaryCache(settings.get('path', DEFAULT_PATH),
+                        int(settings.get('max_entries', DEFAULT_MAX_ENTRIES)),
+                        float(settings.get('max_age_days', DEFAULT_MAX_AGE_DAYS)))
@@ -0,0 +1,125 @@
+"""
+取得と並行して要約を進めるストリーミングのステージ
+
+これまでは全ソースの取得・解析が終わってから要約を始めていたため、取得中は CPU が、
+要約中はネットワークが遊んでいた。ソースの解析が終わるたびに新着記事の見出しを
+上限付きのキューに入れ、要約用のワーカースレッドがキューから取り出して要約する。
+実行全体の所要時間は「取得 + 要約」から「取得と要約の長い方」に近づく。
+
+ワーカーはプロセスではなくスレッドにしている。モデル・要約キャッシュ・実行統計を
+1つのプロセスで共有でき（プロセスごとにモデルを読み込むと数百 MB ずつ増える）、
+推論中の torch は GIL を手放すので、スレッドでも取得と重ねて進む。
+推論が取得より遅いときはキューに溜まった分をまとめて1回の summarize_many に渡すので、
+長さ順のバッチ推論の効果はそのまま得られる。キューが一杯になると投入側が待つ（背圧）。
+モデルの推論は Summarizer の中で一度に1つに制限している（transformers のパイプラインは
+スレッドセーフではない）。workers を増やしても推論そのものは並列にならず、重なるのは言語の
+振り分けやキャッシュの照会だけなので、既定は1つ。推論を速くするには summarizer.torch_threads を使う。
+類似タイトルの統合は全ソースが揃ってから行うため、統合されて出力されない記事も先に要約されることがある。
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import run_stats
+import summarizer
+import url_canon
+
+DEFAULT_WORKERS = 1
+# キューに溜められるソース数（これを超えると投入側が待つ）
+DEFAULT_QUEUE_SIZE = 32
+# ワーカーが1回に取り出して要約する文の最大数
+DEFAULT_MAX_TEXTS = 64
+
+
+class SummaryPipeline:
+    def __init__(self, provider: summarizer.Summarizer, settings: Dict = None, store=None):
+        """
+        ストリーミング要約のステージ
+
+        Args:
+            provider (summarizer.Summarizer): 要約プロバイダー（ワーカー間で共有する）
+            settings (Dict): config.json の summarizer.streaming セクション
+                workers: 要約ワーカーのスレッド数
+                queue_size: キューに溜められるソース数
+                max_texts: ワーカーが1回に要約する文の最大数
+            store: 既出記事ストア（seen_store.SeenStore）。あれば既出の記事は要約しない
+        """
+        settings = settings or {}
+        self.provider = provider
+        self.store = store
+        self.max_texts = max(1, int(settings.get('max_texts', DEFAULT_MAX_TEXTS)))
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(settings.get('queue_size', DEFAULT_QUEUE_SIZE))))
+        self._lock = threading.Lock()
+        self._submitted = set()
+        self._hashes = set()
+        self._summaries: Dict[str, str] = {}
+        self._busy_seconds = 0.0
+        self._workers = [threading.Thread(target=self._work, name=f'summarizer-{i}', daemon=True)
+                         for i in range(max(1, int(settings.get('workers', DEFAULT_WORKERS))))]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, items: List[Dict]) -> None:
+        """ソースの記事を要約待ちに加える（要約が不要なもの・既出・投入済みの見出しは除く）"""
+        if self.store is not None:
+            items = self.store.peek_new(items)
+        texts = []
+        for item in items:
+            # 別ソースから届いた同じ記事（正規化したリンクが同じもの）は1回だけ要約する
+            key = url_canon.item_hash(item)
+            title = item['title']
+            if key in self._hashes or title in self._submitted or not self.provider.needs_summary(title):
+                continue
+            self._hashes.add(key)
+            self._submitted.add(title)
+            texts.append(title)
+        if texts:
+            self._queue.put(texts)
+
+    def _take(self) -> Optional[List[str]]:
+        """
+        キューから1件取り出し、溜まっている分も max_texts まで合わせて返す（終了なら None）
+
+        終了の合図（None）は他のワーカーも受け取れるよう、取り出したらキューに戻す。
+        """
+        texts = self._queue.get()
+        if texts is None:
+            self._queue.put(None)
+            return None
+        while len(texts) < self.max_texts:
+            try:
+                more = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if more is None:
+                self._queue.put(None)
+                break
+            texts = texts + more
+        return texts
+
+    def _work(self) -> None:
+        while True:
+            texts = self._take()
+            if texts is None:
+                return
+            started = time.perf_counter()
+            try:
+                summaries = self.provider.summarize_many(texts)
+            except Exception as e:
+                # 要約できなかった見出しは、取得完了後の要約でもう一度扱う
+                print(f"ストリーミング要約のエラー（{len(texts)}件）: {e}")
+                continue
+            with self._lock:
+                self._summaries.update(zip(texts, summaries))
+                self._busy_seconds += time.perf_counter() - started
+            run_stats.current.incr('要約', '取得と並行して要約', len(texts))
+
+    def finish(self) -> Dict[str, str]:
+        """キューが空になるまで要約し終えてから、{見出し: 要約} を返す"""
+        self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        run_stats.current.record_time('ステージ', '要約（取得と並行）', self._busy_seconds)
+        return self._summaries
@@ -0,0 +1,129 @@
+"""
+記事 URL の正規化と 64 ビットハッシュ
+
+同じ記事でも、トラッキング用パラメータ・フラグメント・末尾のスラッシュ・http と https・
+ホストの別名（www3.nhk.or.jp と www.nhk.or.jp など）の違いで URL が変わる。
+正規化した URL を固定長の整数ハッシュにして、重複判定や既出記事の記録に使う。
+"""
+
+import hashlib
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 同じサイトを指すホスト名 → 代表のホスト名
+DEFAULT_HOST_ALIASES = {
+    'www3.nhk.or.jp': 'www.nhk.or.jp',
+    'nhk.or.jp': 'www.nhk.or.jp',
+    'nikkei.com': 'www.nikkei.com',
+    'fsa.go.jp': 'www.fsa.go.jp',
+    'investing.com': 'www.investing.com',
+}
+# 記事の内容に関係しないクエリパラメータ
+DEFAULT_TRACKING_PARAMS = (
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga',
+    'ref', 'ref_src', 'cmpid', 'ncid', 'n_cid', 'rss', 'feed', 'mod', 'taid',
+)
+# この接頭辞で始まるクエリパラメータも除く（utm_source など）
+TRACKING_PREFIXES = ('utm_', 'at_')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_host_aliases: Dict[str, str] = dict(DEFAULT_HOST_ALIASES)
+_tracking_params = frozenset(DEFAULT_TRACKING_PARAMS)
+
+
+def configure(settings: Optional[Dict] = None) -> None:
+    """
+    config.json の url_canon セクションを反映する
+
+    Args:
+        settings (Dict):
+            host_aliases: 追加するホストの別名（{"別名": "代表のホスト名"}）
+            tracking_params: 追加で除くクエリパラメータ名
+    """
+    global _host_aliases, _tracking_params
+    settings = settings or {}
+    _host_aliases = {**DEFAULT_HOST_ALIASES, **{k.lower(): v.lower()
+                                                for k, v in settings.get('host_aliases', {}).items()}}
+    _tracking_params = frozenset(DEFAULT_TRACKING_PARAMS) | {p.lower() for p in settings.get('tracking_params', [])}
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in _tracking_params or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize(url: str) -> str:
+    """
+    URL を正規化する
+
+    http を https に、ホスト名を小文字の代表名にし、既定のポート・フラグメント・
+    トラッキング用パラメータ・末尾のスラッシュを除き、残りのクエリを名前順に並べる。
+    http(s) 以外の URL は前後の空白を除くだけにする。
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip('.')
+    host = _host_aliases.get(host, host)
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f'{host}:{port}'
+
+    path = parts.path or '/'
+    while '//' in path:
+        path = path.replace('//', '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking(name))
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def hash_text(text: str) -> int:
+    """文字列を SQLite の INTEGER に収まる符号付き 64 ビット整数にする"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def url_hash(url: str) -> int:
+    """正規化した URL の 64 ビットハッシュ"""
+    return hash_text(canonicalize(url))
+
+
+def item_hash(item: Dict) -> int:
+    """
+    記事の 64 ビットハッシュ（正規化したリンク、リンクがなければタイトルから求める）
+
+    一度求めた値は item['url_hash'] に保存し、以降はそれを使う。
+    """
+    value = item.get('url_hash')
+    if value is None:
+        link = item.get('link') or ''
+        value = url_hash(link) if link else hash_text('title:' + item.get('title', ''))
+        item['url_hash'] = value
+    return value
+
+
+def dedup(items: Iterable[Dict]) -> list:
+    """
+    ハッシュが同じ記事を除き、最初に現れたものだけを残す
+
+    残した記事の sources には、同じリンクで届いた記事のソース名（重複なし、出現順）を入れる。
+    """
+    kept: Dict[int, Dict] = {}
+    for item in items:
+        value = item_hash(item)
+        survivor = kept.get(value)
+        if survivor is None:
+            item['sources'] = [item.get('source', '')]
+            kept[value] = item
+        elif item.get('source', '') not in survivor['sources']:
+            survivor['sources'].append(item.get('source', ''))
+    return list(kept.values())